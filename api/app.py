@@ -1,11 +1,27 @@
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from datetime import datetime
 import numpy as np
 import joblib
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 import logging
+import os
+import sys
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(API_DIR, '..', 'src'))
+from config import ASSESSMENT_DB_PATH, DATA_RAW_PATH, DRIFT_REFERENCE_PATH, MODEL_REGISTRY_PATH
+from assessment_store import AssessmentStore
+from patient_batch import (
+    PatientBatch, EMPLOYMENT_RISK, EDUCATION_RISK, RISK_CATEGORIES, RISK_RECOMMENDATIONS,
+    risk_category_code, prediction_fragment, encode_extra
+)
+from ensemble import EnsemblePipeline, default_components, predict_structured
+from schema import ASSESSMENT_SCHEMA, PATIENT_SCHEMA, loads, dumps
+from drift import DriftMonitor
+from model_registry import ModelRegistry
+from model_manager import ModelManager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,11 +29,22 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+def api_path(path: str) -> str:
+    """Resolve a config path (relative to api/) independently of the working directory"""
+    return path if os.path.isabs(path) else os.path.normpath(os.path.join(API_DIR, path))
+
 class MentalHealthAPI:
     """Mental Health Risk Assessment API"""
     
     def __init__(self):
         self.models = self.load_models()
+        self.assessments = self.load_assessment_store()
+        self.model_manager = ModelManager(ModelRegistry(api_path(MODEL_REGISTRY_PATH)), 'risk_model')
+        self.model_manager.start()
+        self.ensemble = EnsemblePipeline(default_components(
+            structured=self.predict_structured_model, structured_budget_ms=100
+        ))
+        self.drift = self.load_drift_monitor()
         logger.info("Mental Health API initialized")
     
     def load_models(self):
@@ -33,38 +60,132 @@ class MentalHealthAPI:
             logger.warning(f"Models not loaded, using demo mode: {e}")
             return {'demo_mode': True}
     
+    def load_assessment_store(self):
+        """Persistent assessment store, or an in-memory one if the database can't be opened"""
+        db_path = api_path(ASSESSMENT_DB_PATH)
+        try:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            return AssessmentStore(db_path)
+        except Exception as e:
+            logger.warning(f"Assessment database unavailable, using in-memory store: {e}")
+            return AssessmentStore()
+    
+    def load_drift_monitor(self):
+        """Drift monitor against the training cohort reference snapshot"""
+        try:
+            return DriftMonitor.from_training_data(api_path(DATA_RAW_PATH), api_path(DRIFT_REFERENCE_PATH))
+        except Exception as e:
+            logger.warning(f"Drift monitoring disabled: {e}")
+            return None
+    
     def predict_risk(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
         """Predict mental health risk"""
         try:
             # Extract features
             features = self.extract_features(patient_data)
             
-            # Calculate risk score (simplified for demo)
-            risk_score = self.calculate_risk_score(features)
+            # Registry model if one is deployed, else the clinical formula
+            risk_score, model_version = self.score_patient(patient_data, features)
             
             # Generate response
-            return {
+            response = {
                 'risk_score': risk_score,
                 'risk_category': self.categorize_risk(risk_score),
                 'confidence': 0.85,
                 'recommendations': self.generate_recommendations(risk_score),
                 'timestamp': datetime.now().isoformat(),
-                'model_version': '1.0'
+                'model_version': model_version
             }
             
+            # Returning patients: attach trajectory features (single indexed lookup)
+            if 'patient_id' in patient_data:
+                trajectory = self.assessments.get_trajectory(patient_data['patient_id'])
+                if trajectory is not None:
+                    response['trajectory'] = trajectory
+            
+            return response
+            
         except Exception as e:
             logger.error(f"Prediction error: {e}")
             return {'error': str(e), 'risk_score': 0.5, 'risk_category': 'Unknown'}
     
+    def predict_risk_json(self, patient_data: Dict[str, Any]) -> Tuple[str, str]:
+        """Predict risk for a schema-validated patient, encoded straight to JSON
+        
+        Returns the response body and the risk category
+        """
+        risk_score, model_version = self.score_patient(patient_data)
+        code = risk_category_code(risk_score)
+        body = prediction_fragment(
+            risk_score, code,
+            dumps(datetime.now().isoformat()),
+            model_version=model_version,
+            extra=encode_extra(self.trajectory_fragment(patient_data))
+        )
+        return body, RISK_CATEGORIES[code]
+    
+    def score_patient(self, patient_data: Dict[str, Any], features: Dict[str, float] = None) -> Tuple[float, str]:
+        """Risk score and model version: the routed registry model, else the clinical formula ('1.0')"""
+        scored = self.model_manager.predict_versioned(patient_data)
+        if scored is not None:
+            return scored
+        return self.calculate_risk_score(features or self.extract_features(patient_data)), '1.0'
+    
+    def score_batch(self, batch: PatientBatch, patients: list) -> PatientBatch:
+        """Formula-score a batch, then overwrite valid patients with registry model scores if deployed"""
+        batch.score()
+        scored = self.model_manager.predict_batch(batch, patients)
+        if scored is not None:
+            batch.apply_scores(*scored)
+        return batch.attach_extras(self.trajectory_fragments(patients, np.flatnonzero(batch.records['valid'])))
+    
+    def trajectory_fragments(self, patients: list, rows) -> Dict[int, Dict[str, str]]:
+        """Pre-encoded trajectories for returning patients in a batch (one IN query per 500 ids)"""
+        with_ids = {int(i): str(patients[i]['patient_id']) for i in rows if 'patient_id' in patients[i]}
+        trajectories = self.assessments.get_trajectories(with_ids.values())
+        return {
+            i: {'trajectory': dumps(trajectories[patient_id])}
+            for i, patient_id in with_ids.items() if patient_id in trajectories
+        }
+    
+    def trajectory_fragment(self, patient_data: Dict[str, Any]) -> Dict[str, str]:
+        """Pre-encoded trajectory features for returning patients (single indexed lookup)"""
+        if 'patient_id' not in patient_data:
+            return {}
+        trajectory = self.assessments.get_trajectory(patient_data['patient_id'])
+        return {} if trajectory is None else {'trajectory': dumps(trajectory)}
+    
+    def predict_structured_model(self, patient_data: Dict[str, Any]) -> float:
+        """Structured component: registry model if one is loaded, else the clinical formula"""
+        score = self.model_manager.predict(patient_data)
+        return predict_structured(patient_data) if score is None else score
+    
+    def predict_ensemble(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Predict risk with the concurrent structured/text/survival ensemble"""
+        result = self.ensemble.predict(patient_data)
+        risk_score = result['final_risk_score']
+        breakdown = result['model_breakdown']
+        
+        recommendations = self.generate_recommendations(risk_score)
+        if breakdown.get('text_model', 0.5) > 0.7:
+            recommendations.append("Clinical note indicates elevated concern")
+        if breakdown.get('survival_risk', 0.5) > 0.6:
+            recommendations.append("Historical patterns suggest increased monitoring")
+        
+        return {
+            **result,
+            'risk_category': self.categorize_risk(risk_score),
+            'recommendations': recommendations,
+            'timestamp': datetime.now().isoformat(),
+            'model_version': self.model_manager.version_for(patient_data)
+        }
+    
     def extract_features(self, patient_data: Dict[str, Any]) -> Dict[str, float]:
         """Extract and calculate features"""
-        employment_risk = {"Employed": 0, "Unemployed": 2, "Disabled": 3, "Student": 1, "Retired": 1}
-        education_risk = {"High School": 1, "College": 0, "Graduate": 0, "Other": 1}
-        
         employment = patient_data.get('employment', 'Employed')
         education = patient_data.get('education', 'College')
         
-        social_risk = employment_risk.get(employment, 1) + education_risk.get(education, 0)
+        social_risk = EMPLOYMENT_RISK.get(employment, 1) + EDUCATION_RISK.get(education, 0)
         
         return {
             'phq9_score': patient_data.get('phq9_score', 0),
@@ -86,45 +207,11 @@ class MentalHealthAPI:
     
     def categorize_risk(self, risk_score: float) -> str:
         """Categorize risk score"""
-        if risk_score < 0.3:
-            return 'Low Risk'
-        elif risk_score < 0.6:
-            return 'Moderate Risk'
-        elif risk_score < 0.8:
-            return 'High Risk'
-        else:
-            return 'Very High Risk'
+        return RISK_CATEGORIES[risk_category_code(risk_score)]
     
     def generate_recommendations(self, risk_score: float) -> list:
         """Generate clinical recommendations based on risk"""
-        if risk_score >= 0.8:
-            return [
-                "Immediate clinical assessment required",
-                "Consider crisis intervention services",
-                "Frequent monitoring recommended",
-                "Safety planning with patient"
-            ]
-        elif risk_score >= 0.6:
-            return [
-                "Schedule urgent follow-up within 48 hours",
-                "Increase therapy session frequency",
-                "Consider medication evaluation",
-                "Develop crisis management plan"
-            ]
-        elif risk_score >= 0.3:
-            return [
-                "Regular follow-up in 1-2 weeks",
-                "Continue current treatment plan",
-                "Monitor symptom progression",
-                "Provide coping strategy resources"
-            ]
-        else:
-            return [
-                "Routine monitoring",
-                "Maintain current support systems",
-                "Preventive mental health education",
-                "Regular check-ins"
-            ]
+        return list(RISK_RECOMMENDATIONS[risk_category_code(risk_score)])
 
 # Initialize API
 api_handler = MentalHealthAPI()
@@ -135,61 +222,188 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'version': '1.0'
+        'version': '1.0',
+        'model_version': api_handler.model_manager.version_for({}, default=None)
     })
 
 @app.route('/predict', methods=['POST'])
 def predict():
     """Risk prediction endpoint"""
+    try:
+        try:
+            data = loads(request.get_data())
+        except ValueError:
+            return jsonify({'error': 'Invalid JSON'}), 400
+        
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+        
+        # Validate with the compiled schema (ranges and enums included)
+        error = PATIENT_SCHEMA.validate(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        body, risk_category = api_handler.predict_risk_json(data)
+        if api_handler.drift is not None:
+            api_handler.drift.record(data)
+        
+        logger.info(f"Prediction made: {risk_category}")
+        
+        return Response(body, mimetype='application/json')
+        
+    except Exception as e:
+        logger.error(f"Prediction endpoint error: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/ensemble_predict', methods=['POST'])
+def ensemble_predict():
+    """Ensemble risk prediction endpoint"""
     try:
         data = request.get_json()
         
         if not data:
             return jsonify({'error': 'No JSON data provided'}), 400
         
-        # Validate required fields
-        required_fields = ['phq9_score', 'gad7_score']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        error = PATIENT_SCHEMA.validate(data)
+        if error:
+            return jsonify({'error': error}), 400
         
-        # Make prediction
-        prediction = api_handler.predict_risk(data)
+        prediction = api_handler.predict_ensemble(data)
         
-        logger.info(f"Prediction made: {prediction['risk_category']}")
+        logger.info(
+            f"Ensemble prediction made: {prediction['risk_category']} "
+            f"({prediction['total_latency_ms']:.1f} ms)"
+        )
         
         return jsonify(prediction)
         
     except Exception as e:
-        logger.error(f"Prediction endpoint error: {e}")
+        logger.error(f"Ensemble endpoint error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/batch_predict', methods=['POST'])
 def batch_predict():
     """Batch prediction endpoint"""
     try:
-        data = request.get_json()
+        try:
+            data = loads(request.get_data())
+        except ValueError:
+            return jsonify({'error': 'Invalid JSON'}), 400
         
-        if not data or 'patients' not in data:
+        if not isinstance(data, dict) or not isinstance(data.get('patients'), list):
             return jsonify({'error': 'No patients data provided'}), 400
         
-        predictions = []
-        for patient in data['patients']:
-            prediction = api_handler.predict_risk(patient)
-            predictions.append({
-                'patient_id': patient.get('patient_id', 'unknown'),
-                **prediction
-            })
+        # Column-array batch validated as whole columns; invalid patients are reported individually
+        batch = api_handler.score_batch(PATIENT_SCHEMA.to_batch(data['patients']), data['patients'])
+        response = Response(batch.iter_json(), mimetype='application/json')
+        if api_handler.drift is not None:
+            # Binned once the streamed body has been sent, off the latency path
+            response.call_on_close(lambda: api_handler.drift.record_batch(batch))
+        
+        return response
+        
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/drift', methods=['GET'])
+def drift_report():
+    """Feature drift of scored traffic against the training cohort"""
+    if api_handler.drift is None:
+        return jsonify({'error': 'Drift monitoring unavailable'}), 503
+    return jsonify(api_handler.drift.report())
+
+@app.route('/drift/reset', methods=['POST'])
+def drift_reset():
+    """Start a new drift monitoring window"""
+    if api_handler.drift is None:
+        return jsonify({'error': 'Drift monitoring unavailable'}), 503
+    api_handler.drift.reset()
+    return jsonify({'status': 'reset', 'timestamp': datetime.now().isoformat()})
+
+@app.route('/models', methods=['GET'])
+def model_status():
+    """Active/candidate model versions and routing"""
+    return jsonify(api_handler.model_manager.status())
+
+@app.route('/models/deploy', methods=['POST'])
+def deploy_model():
+    """Load and pre-warm a registered version in the background, then swap or stage it"""
+    try:
+        data = request.get_json(silent=True) or {}
+        mode = data.get('mode', 'swap')
+        fraction = float(data.get('fraction', 0.1))
+        if not 0 <= fraction <= 1:
+            return jsonify({'error': 'fraction must be between 0 and 1'}), 400
+        
+        version = api_handler.model_manager.deploy(data.get('version'), mode=mode, fraction=fraction)
+        
+        return jsonify({
+            'status': 'loading',
+            'version': version,
+            'mode': mode
+        }), 202
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/models/promote', methods=['POST'])
+def promote_model():
+    """Promote the canary/shadow candidate to active"""
+    try:
+        version = api_handler.model_manager.promote()
+        return jsonify({'status': 'promoted', 'version': version})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/models/abort', methods=['POST'])
+def abort_model():
+    """Drop the canary/shadow candidate"""
+    api_handler.model_manager.abort()
+    return jsonify(api_handler.model_manager.status())
+
+@app.route('/assessments', methods=['POST'])
+def add_assessments():
+    """Record one or more longitudinal assessments"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+        
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        
+        assessments = data.get('assessments', [data])
+        if not isinstance(assessments, list):
+            return jsonify({'error': 'assessments must be a list'}), 400
+        for assessment in assessments:
+            error = ASSESSMENT_SCHEMA.validate(assessment)
+            if error:
+                return jsonify({'error': error}), 400
+        
+        trajectories = api_handler.assessments.add_assessment_records(assessments)
         
         return jsonify({
-            'predictions': predictions,
-            'total_patients': len(predictions),
+            'trajectories': trajectories,
+            'total_assessments': len(trajectories),
+            'duplicates': sum(trajectory['duplicate'] for trajectory in trajectories),
             'timestamp': datetime.now().isoformat()
-        })
+        }), 201
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        logger.error(f"Batch prediction error: {e}")
+        logger.error(f"Assessment endpoint error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/patients/<patient_id>/trajectory', methods=['GET'])
+def patient_trajectory(patient_id):
+    """Trajectory features for a returning patient"""
+    trajectory = api_handler.assessments.get_trajectory(patient_id)
+    if trajectory is None:
+        return jsonify({'error': f'No assessments for patient: {patient_id}'}), 404
+    return jsonify(trajectory)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
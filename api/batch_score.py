@@ -0,0 +1,298 @@
+"""Partitioned, resumable offline batch scoring
+
+Usage:
+    python batch_score.py cohort.csv scores/ --workers 16
+    python batch_score.py cohort.parquet scores/ --output-format parquet
+
+The input is split into partitions (byte ranges aligned to line breaks for
+CSV, row groups for Parquet). Partitions are scored in a process pool with
+the same schema validation and model as /batch_predict: the registry's
+production (else latest) risk_model, loaded once per worker and scored
+through the API's feature pipeline, or the clinical formula (version
+'1.0') when nothing is registered. Each partition is written as its own
+output shard. A manifest in the output directory records completed shards
+and the model version, so rerunning the same command after an interruption
+only scores the partitions that are missing, with the same model version
+even if another one was promoted in the meantime.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(API_DIR, '..', 'src'))
+from config import MODEL_REGISTRY_PATH
+from model_registry import ModelRegistry
+from model_manager import batch_frame, package_predict
+from patient_batch import RISK_CATEGORIES
+from schema import PATIENT_SCHEMA
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_REGISTRY = os.path.normpath(os.path.join(API_DIR, MODEL_REGISTRY_PATH))
+FORMULA_VERSION = '1.0'
+
+# Registry artifacts already loaded in this (worker) process
+_artifacts: Dict[tuple, Any] = {}
+
+
+def input_fingerprint(path: str) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def plan_csv_partitions(path: str, partition_bytes: int) -> List[Dict[str, Any]]:
+    """Split a CSV into byte ranges that start and end on line boundaries
+
+    Assumes no quoted fields contain embedded newlines.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()
+        offsets = [f.tell()]
+        while offsets[-1] + partition_bytes < size:
+            f.seek(offsets[-1] + partition_bytes)
+            f.readline()
+            if f.tell() >= size:
+                break
+            offsets.append(f.tell())
+    offsets.append(size)
+
+    return [
+        {'partition': i, 'start': start, 'end': end}
+        for i, (start, end) in enumerate(zip(offsets[:-1], offsets[1:]))
+    ]
+
+
+def plan_parquet_partitions(path: str, partition_rows: int) -> List[Dict[str, Any]]:
+    """Group Parquet row groups into partitions of roughly partition_rows"""
+    import pyarrow.parquet as pq
+
+    metadata = pq.ParquetFile(path).metadata
+    partitions, current, current_rows = [], [], 0
+    for group in range(metadata.num_row_groups):
+        current.append(group)
+        current_rows += metadata.row_group(group).num_rows
+        if current_rows >= partition_rows:
+            partitions.append(current)
+            current, current_rows = [], 0
+    if current:
+        partitions.append(current)
+
+    return [{'partition': i, 'row_groups': groups} for i, groups in enumerate(partitions)]
+
+
+def read_partition(path: str, task: Dict[str, Any]) -> pd.DataFrame:
+    if 'row_groups' in task:
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).read_row_groups(task['row_groups']).to_pandas()
+
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(task['start'])
+        body = f.read(task['end'] - task['start'])
+    return pd.read_csv(io.BytesIO(header + body))
+
+
+def resolve_model(registry_root: str, name: str, version: str = None) -> Optional[Dict[str, str]]:
+    """Registry model to score with (production alias, else latest), or None for the formula"""
+    registry = ModelRegistry(registry_root)
+    version = registry.resolve(name, version)
+    if version is None:
+        return None
+    if version not in {v['version'] for v in registry.list_versions(name)}:
+        raise SystemExit(f"Unknown version {version} of {name} in {registry_root}")
+    return {'registry': os.path.abspath(registry_root), 'name': name, 'version': version}
+
+
+def load_artifact(model: Dict[str, str]) -> Any:
+    """Load a registry artifact once per process"""
+    key = (model['registry'], model['name'], model['version'])
+    if key not in _artifacts:
+        _artifacts[key], _ = ModelRegistry(model['registry']).load(model['name'], model['version'])
+    return _artifacts[key]
+
+
+def score_frame(df: pd.DataFrame, id_column: str = 'patient_id', artifact: Any = None,
+                model_version: str = FORMULA_VERSION, chunk_size: int = 65536) -> pd.DataFrame:
+    """Score a cohort DataFrame as /batch_predict would with this model (formula if artifact is None)"""
+    patient_ids = df[id_column] if id_column in df.columns else None
+    batch = PATIENT_SCHEMA.frame_to_batch(df, patient_ids=patient_ids).score()
+    records = batch.records
+    if artifact is not None:
+        rows = np.flatnonzero(records['valid'])
+        scores = np.empty(len(rows), dtype=np.float64)
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            scores[start:start + len(chunk)] = package_predict(artifact, batch_frame(batch, chunk, df))
+        batch.apply_scores(scores)
+
+    categories = np.asarray(RISK_CATEGORIES + ['Unknown'], dtype=object)
+    valid = records['valid']
+    errors = np.full(len(df), '', dtype=object)
+    for index, message in batch.errors.items():
+        errors[index] = message
+
+    return pd.DataFrame({
+        'patient_id': batch.patient_ids,
+        'risk_score': np.where(valid, records['risk_score'], np.nan),
+        'risk_category': categories[np.where(valid, records['risk_category'], len(RISK_CATEGORIES))],
+        'model_version': np.where(valid, model_version, ''),
+        'error': errors
+    })
+
+
+def score_partition(path: str, task: Dict[str, Any], output_dir: str, output_format: str,
+                    id_column: str, model: Optional[Dict[str, str]]) -> Dict[str, Any]:
+    """Worker: read, score and atomically write one output shard"""
+    start = time.perf_counter()
+    df = read_partition(path, task)
+    if model is None:
+        artifact, model_version = None, FORMULA_VERSION
+    else:
+        artifact, model_version = load_artifact(model), model['version']
+    scores = score_frame(df, id_column, artifact, model_version)
+    if id_column not in df.columns:
+        scores['patient_id'] = f"{task['partition']}-" + scores['patient_id'].astype(str)
+
+    shard = f"part-{task['partition']:05d}.{output_format}"
+    temporary = os.path.join(output_dir, f'.{shard}.tmp')
+    if output_format == 'parquet':
+        scores.to_parquet(temporary, index=False)
+    else:
+        scores.to_csv(temporary, index=False)
+    os.replace(temporary, os.path.join(output_dir, shard))
+
+    return {
+        **task,
+        'status': 'done',
+        'output': shard,
+        'model_version': model_version,
+        'rows': len(scores),
+        'invalid_rows': int((scores['error'] != '').sum()),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+def write_manifest(output_dir: str, manifest: Dict[str, Any]):
+    temporary = os.path.join(output_dir, f'.{MANIFEST_NAME}.tmp')
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temporary, os.path.join(output_dir, MANIFEST_NAME))
+
+
+def load_or_plan(input_path: str, output_dir: str, partition_mb: int, partition_rows: int,
+                 overwrite: bool) -> Dict[str, Any]:
+    """Resume an existing manifest for the same input, or plan a new run"""
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    fingerprint = input_fingerprint(input_path)
+
+    if os.path.exists(manifest_path) and not overwrite:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest['input'] != fingerprint:
+            raise SystemExit(
+                f"{manifest_path} was written for a different input; use --overwrite to start again"
+            )
+        for task in manifest['partitions']:
+            if task.get('status') == 'done' and not os.path.exists(os.path.join(output_dir, task['output'])):
+                task['status'] = 'pending'
+        return manifest
+
+    if input_path.endswith('.parquet'):
+        partitions = plan_parquet_partitions(input_path, partition_rows)
+    else:
+        partitions = plan_csv_partitions(input_path, partition_mb * 1024 * 1024)
+    for task in partitions:
+        task['status'] = 'pending'
+
+    return {'input': fingerprint, 'created': time.time(), 'partitions': partitions}
+
+
+def run(input_path: str, output_dir: str, workers: int = None, partition_mb: int = 64,
+        partition_rows: int = 1_000_000, output_format: str = 'csv', id_column: str = 'patient_id',
+        overwrite: bool = False, registry_root: str = DEFAULT_REGISTRY, model_name: str = 'risk_model',
+        model_version: str = None) -> Dict[str, Any]:
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_or_plan(input_path, output_dir, partition_mb, partition_rows, overwrite)
+
+    # The model is resolved once per run and pinned in the manifest for resumes
+    if 'model_version' not in manifest:
+        manifest['model'] = resolve_model(registry_root, model_name, model_version)
+        manifest['model_version'] = manifest['model']['version'] if manifest['model'] else FORMULA_VERSION
+    elif model_version is not None and \
+            ModelRegistry(registry_root).resolve(model_name, model_version) != manifest['model_version']:
+        raise SystemExit(
+            f"Existing run was scored with model version {manifest['model_version']}; "
+            f"use --overwrite to rescore with {model_version}"
+        )
+    model = manifest['model']
+    logger.info(f"Scoring with {model['name'] if model else 'clinical formula'} {manifest['model_version']}")
+    write_manifest(output_dir, manifest)
+
+    pending = [task for task in manifest['partitions'] if task['status'] != 'done']
+    logger.info(
+        f"{len(manifest['partitions'])} partitions, {len(pending)} to score "
+        f"({len(manifest['partitions']) - len(pending)} already complete)"
+    )
+
+    start = time.perf_counter()
+    rows = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(score_partition, input_path, task, output_dir, output_format, id_column, model): task
+            for task in pending
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            manifest['partitions'][result['partition']] = result
+            write_manifest(output_dir, manifest)
+            rows += result['rows']
+            logger.info(f"Partition {result['partition']}: {result['rows']:,} rows in {result['seconds']:.2f}s")
+
+    elapsed = time.perf_counter() - start
+    manifest['completed'] = time.time()
+    manifest['total_rows'] = sum(task.get('rows', 0) for task in manifest['partitions'])
+    write_manifest(output_dir, manifest)
+
+    if rows:
+        logger.info(f"Scored {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Partitioned, resumable offline risk scoring')
+    parser.add_argument('input', help='Cohort CSV or Parquet file')
+    parser.add_argument('output_dir', help='Directory for output shards and manifest.json')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--partition-mb', type=int, default=64, help='CSV partition size in MB')
+    parser.add_argument('--partition-rows', type=int, default=1_000_000, help='Parquet rows per partition')
+    parser.add_argument('--output-format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--id-column', default='patient_id')
+    parser.add_argument('--overwrite', action='store_true', help='Ignore an existing manifest and start again')
+    parser.add_argument('--registry', default=DEFAULT_REGISTRY, help='Model registry root')
+    parser.add_argument('--model-name', default='risk_model')
+    parser.add_argument('--model-version', default=None, help='Version or alias (default: production, else latest)')
+    args = parser.parse_args()
+
+    run(
+        args.input, args.output_dir,
+        workers=args.workers, partition_mb=args.partition_mb, partition_rows=args.partition_rows,
+        output_format=args.output_format, id_column=args.id_column, overwrite=args.overwrite,
+        registry_root=args.registry, model_name=args.model_name, model_version=args.model_version
+    )
+
+
+if __name__ == '__main__':
+    main()
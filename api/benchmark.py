@@ -0,0 +1,97 @@
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+import app as api_app
+from app import api_handler
+from schema import PATIENT_SCHEMA, loads
+
+EMPLOYMENT = ['Employed', 'Unemployed', 'Disabled', 'Student', 'Retired']
+EDUCATION = ['High School', 'College', 'Graduate', 'Other']
+
+
+def sample_patients(n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Random valid patient payloads"""
+    rng = random.Random(seed)
+    return [
+        {
+            'patient_id': f'P{i:07d}',
+            'phq9_score': rng.randint(0, 27),
+            'gad7_score': rng.randint(0, 21),
+            'age': rng.randint(18, 90),
+            'employment': rng.choice(EMPLOYMENT),
+            'education': rng.choice(EDUCATION)
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_predict(raw: bytes) -> str:
+    """Pre-schema /predict path: dict validation loop, predict_risk, sorted json encode"""
+    data = json.loads(raw)
+    for field in ['phq9_score', 'gad7_score']:
+        if field not in data:
+            return json.dumps({'error': f'Missing required field: {field}'})
+    return json.dumps(api_handler.predict_risk(data), sort_keys=True)
+
+
+def compiled_predict(raw: bytes) -> str:
+    """Current /predict path: fast decode, compiled schema, preencoded fragments"""
+    data = loads(raw)
+    error = PATIENT_SCHEMA.validate(data)
+    if error:
+        return json.dumps({'error': error})
+    return api_handler.predict_risk_json(data)[0]
+
+
+def legacy_batch_predict(raw: bytes) -> str:
+    """Pre-schema /batch_predict path: one predict_risk dict per patient"""
+    data = json.loads(raw)
+    predictions = [
+        {'patient_id': patient.get('patient_id', 'unknown'), **api_handler.predict_risk(patient)}
+        for patient in data['patients']
+    ]
+    return json.dumps({'predictions': predictions, 'total_patients': len(predictions)}, sort_keys=True)
+
+
+def compiled_batch_predict(raw: bytes) -> str:
+    """Current /batch_predict path"""
+    batch = PATIENT_SCHEMA.to_batch(loads(raw)['patients']).score()
+    return batch.to_json()
+
+
+def time_per_call(func: Callable[[bytes], str], raw: bytes, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(raw)
+    return (time.perf_counter() - start) / repeats
+
+
+def benchmark_request_overhead(repeats: int = 2000, batch_size: int = 10_000) -> Dict[str, float]:
+    """Per-request JSON + validation + scoring overhead before and after schema compilation"""
+    single = json.dumps(sample_patients(1)[0]).encode()
+    batch = json.dumps({'patients': sample_patients(batch_size)}).encode()
+
+    results = {
+        'predict_legacy_us': time_per_call(legacy_predict, single, repeats) * 1e6,
+        'predict_compiled_us': time_per_call(compiled_predict, single, repeats) * 1e6,
+        'batch_legacy_us_per_patient': time_per_call(legacy_batch_predict, batch, 3) / batch_size * 1e6,
+        'batch_compiled_us_per_patient': time_per_call(compiled_batch_predict, batch, 3) / batch_size * 1e6
+    }
+
+    # Full Flask round trip for reference
+    client = api_app.app.test_client()
+    start = time.perf_counter()
+    for _ in range(repeats // 4):
+        client.post('/predict', data=single, content_type='application/json')
+    results['predict_endpoint_us'] = (time.perf_counter() - start) / (repeats // 4) * 1e6
+
+    for name, value in results.items():
+        print(f"{name:32s} {value:10.2f}")
+    return results
+
+
+if __name__ == '__main__':
+    api_app.logger.setLevel('WARNING')
+    benchmark_request_overhead()
@@ -0,0 +1,271 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from patient_batch import PatientBatch, EMPLOYMENT_LEVELS, EDUCATION_LEVELS
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_FEATURES = {'phq9_score': 0, 'gad7_score': 0, 'age': 45}
+CATEGORICAL_FEATURES = {
+    'employment': ('Employed', EMPLOYMENT_LEVELS),
+    'education': ('College', EDUCATION_LEVELS)
+}
+OTHER = '__other__'
+EPSILON = 1e-4
+
+
+def build_reference(df: pd.DataFrame, n_bins: int = 20) -> Dict[str, Any]:
+    """Reference snapshot from the training cohort
+
+    Numeric features are binned on reference quantiles (so each bin holds
+    roughly 1/n_bins of the training data); categoricals store level
+    proportions over the API's known levels plus an overflow bucket.
+    """
+    reference = {'n_rows': len(df), 'numeric': {}, 'categorical': {}}
+
+    for feature in NUMERIC_FEATURES:
+        values = df[feature].dropna().to_numpy(dtype=np.float64)
+        inner = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(inner, values, side='right'), minlength=len(inner) + 1)
+        reference['numeric'][feature] = {
+            'edges': inner.tolist(),
+            'proportions': (counts / counts.sum()).tolist()
+        }
+
+    for feature, (_, levels) in CATEGORICAL_FEATURES.items():
+        counts = df[feature].value_counts()
+        buckets = list(levels) + [OTHER]
+        totals = np.array([counts.get(level, 0) for level in levels] + [counts.drop(levels, errors='ignore').sum()])
+        reference['categorical'][feature] = {
+            'levels': buckets,
+            'proportions': (totals / max(totals.sum(), 1)).tolist()
+        }
+
+    return reference
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population stability index between two proportion vectors"""
+    expected = np.maximum(expected, EPSILON)
+    actual = np.maximum(actual, EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    """KS statistic evaluated at the reference bin edges"""
+    return float(np.max(np.abs(np.cumsum(actual) - np.cumsum(expected))))
+
+
+def drift_status(psi_value: float) -> str:
+    if psi_value < 0.1:
+        return 'stable'
+    if psi_value < 0.25:
+        return 'moderate'
+    return 'significant'
+
+
+class BinnedCounts(NamedTuple):
+    """Histogram increments for one scored batch"""
+    numeric: Dict[str, np.ndarray]
+    categorical: Dict[str, np.ndarray]
+
+
+class DriftMonitor:
+    """In-process feature drift monitor with fixed-memory sketches
+
+    Single-request handlers only append the already-parsed payload to a
+    bounded queue, which is a constant-time pointer push. Scored batches
+    are binned (a vectorised searchsorted/bincount over the batch columns)
+    by record_batch, which /batch_predict calls once the response has been
+    sent, and only the resulting fixed-size counts are queued, so the queue
+    never holds patient arrays. A background thread
+    folds queued items into fixed-size histograms over the reference bins
+    and category counters, so memory does not grow with traffic or batch
+    size. When the queue is full the oldest items are dropped and counted
+    rather than blocking.
+    """
+
+    def __init__(self, reference: Dict[str, Any], queue_size: int = 100_000, flush_interval: float = 0.5):
+        self.reference = reference
+        self.edges = {f: np.asarray(spec['edges']) for f, spec in reference['numeric'].items()}
+        self.levels = {
+            f: {level: i for i, level in enumerate(spec['levels'])}
+            for f, spec in reference['categorical'].items()
+        }
+        # Batch codes follow the API level order; the trailing unknown code maps to OTHER
+        self.batch_remap = {
+            feature: np.array([self.levels[feature].get(level, self.levels[feature][OTHER]) for level in levels]
+                              + [self.levels[feature][OTHER]])
+            for feature, (_, levels) in CATEGORICAL_FEATURES.items()
+        }
+        self._queue = deque(maxlen=queue_size)
+        self._enqueued = 0
+        self._processed = 0
+        self._lock = threading.Lock()
+        self._count_lock = threading.Lock()
+        self.reset()
+
+        self._flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, name='drift-monitor', daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'DriftMonitor':
+        with open(path) as f:
+            return cls(json.load(f), **kwargs)
+
+    @classmethod
+    def from_training_data(cls, data_path: str, reference_path: Optional[str] = None, **kwargs) -> 'DriftMonitor':
+        """Load a saved reference snapshot, or build (and save) one from the training CSV"""
+        if reference_path and os.path.exists(reference_path):
+            return cls.from_file(reference_path, **kwargs)
+
+        reference = build_reference(pd.read_csv(data_path))
+        if reference_path:
+            with open(reference_path, 'w') as f:
+                json.dump(reference, f, indent=2)
+        return cls(reference, **kwargs)
+
+    def reset(self):
+        """Start a new monitoring window"""
+        with self._lock:
+            self.numeric_counts = {f: np.zeros(len(e) + 1, dtype=np.int64) for f, e in self.edges.items()}
+            self.categorical_counts = {f: np.zeros(len(l), dtype=np.int64) for f, l in self.levels.items()}
+            self.window_start = time.time()
+
+    # --- request path: O(1), no parsing -----------------------------------
+
+    def record(self, patient_data: Dict[str, Any]):
+        self._enqueue(patient_data)
+
+    def record_batch(self, batch: PatientBatch):
+        """Bin a scored batch and queue its counts (call after the response is sent)"""
+        self._enqueue(self.bin_batch(batch))
+
+    def _enqueue(self, item: Any):
+        with self._count_lock:
+            self._queue.append(item)
+            self._enqueued += 1
+
+    def bin_batch(self, batch: PatientBatch) -> BinnedCounts:
+        """Histogram counts for a batch's valid patients (no per-patient data kept)"""
+        records = batch.records
+        valid = records['valid']
+        return BinnedCounts(
+            {
+                feature: self._numeric_counts(feature, records[feature][valid])
+                for feature in NUMERIC_FEATURES
+            },
+            {
+                feature: np.bincount(remap[records[feature][valid]], minlength=len(self.levels[feature]))
+                for feature, remap in self.batch_remap.items()
+            }
+        )
+
+    # --- background aggregation ---------------------------------------------
+
+    def _run(self):
+        while not self._stop.wait(self._flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Drift monitor flush failed: {e}")
+
+    def flush(self):
+        """Fold everything queued so far into the sketches"""
+        # Taken and counted together, so enqueued - processed - depth counts exactly the drops
+        with self._count_lock:
+            items = list(self._queue)
+            self._queue.clear()
+            self._processed += len(items)
+        if not items:
+            return
+
+        records = [item for item in items if isinstance(item, dict)]
+        binned = [item for item in items if isinstance(item, BinnedCounts)]
+
+        with self._lock:
+            if records:
+                for feature, default in NUMERIC_FEATURES.items():
+                    values = np.array([r.get(feature, default) for r in records], dtype=np.float64)
+                    self.numeric_counts[feature] += self._numeric_counts(feature, values)
+                for feature, (default, _) in CATEGORICAL_FEATURES.items():
+                    lookup, other = self.levels[feature], self.levels[feature][OTHER]
+                    codes = np.fromiter(
+                        (lookup.get(r.get(feature, default), other) for r in records),
+                        dtype=np.int64, count=len(records)
+                    )
+                    self.categorical_counts[feature] += np.bincount(codes, minlength=len(lookup))
+
+            for counts in binned:
+                for feature, increment in counts.numeric.items():
+                    self.numeric_counts[feature] += increment
+                for feature, increment in counts.categorical.items():
+                    self.categorical_counts[feature] += increment
+
+
+    def _numeric_counts(self, feature: str, values: np.ndarray) -> np.ndarray:
+        values = values[~np.isnan(values)]
+        bins = np.searchsorted(self.edges[feature], values, side='right')
+        return np.bincount(bins, minlength=len(self.edges[feature]) + 1)
+
+    # --- reporting ----------------------------------------------------------
+
+    def report(self) -> Dict[str, Any]:
+        """PSI / KS-style drift scores for the current window"""
+        with self._lock:
+            numeric_counts = {f: c.copy() for f, c in self.numeric_counts.items()}
+            categorical_counts = {f: c.copy() for f, c in self.categorical_counts.items()}
+
+        features = {}
+        for feature, counts in numeric_counts.items():
+            expected = np.asarray(self.reference['numeric'][feature]['proportions'])
+            features[feature] = self._compare(expected, counts, ks=True)
+        for feature, counts in categorical_counts.items():
+            expected = np.asarray(self.reference['categorical'][feature]['proportions'])
+            features[feature] = self._compare(expected, counts, ks=False)
+            if counts.sum():
+                features[feature]['live_proportions'] = dict(zip(
+                    self.reference['categorical'][feature]['levels'], (counts / counts.sum()).round(4).tolist()
+                ))
+
+        with self._count_lock:
+            enqueued, processed, queue_depth = self._enqueued, self._processed, len(self._queue)
+
+        return {
+            'window_start': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.window_start)),
+            'reference_rows': self.reference['n_rows'],
+            'events_enqueued': enqueued,
+            'events_processed': processed,
+            'events_dropped': max(0, enqueued - processed - queue_depth),
+            'queue_depth': queue_depth,
+            'features': features
+        }
+
+    @staticmethod
+    def _compare(expected: np.ndarray, counts: np.ndarray, ks: bool) -> Dict[str, Any]:
+        n = int(counts.sum())
+        if n == 0:
+            return {'observations': 0, 'psi': None, 'status': 'no data'}
+        actual = counts / n
+        result = {'observations': n, 'psi': round(psi(expected, actual), 4)}
+        if ks:
+            result['ks'] = round(binned_ks(expected, actual), 4)
+        else:
+            result['total_variation'] = round(float(np.abs(actual - expected).sum() / 2), 4)
+        result['status'] = drift_status(result['psi'])
+        return result
+
+    def stop(self):
+        self._stop.set()
+        self._worker.join(timeout=1)
+        self.flush()
@@ -0,0 +1,171 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from patient_batch import EMPLOYMENT_RISK, EDUCATION_RISK
+
+NEGATIVE_TERMS = ['hopeless', 'suicidal', 'overwhelmed', 'burden', 'isolated']
+POSITIVE_TERMS = ['improved', 'better', 'progress', 'hopeful', 'coping']
+
+
+@dataclass
+class EnsembleComponent:
+    """One ensemble member: a scoring function, its weight, latency budget and concurrency cap"""
+    name: str
+    predict: Callable[[Dict[str, Any]], float]
+    weight: float
+    budget_ms: float
+    max_concurrency: int = 4
+
+
+def social_risk(patient_data: Dict[str, Any]) -> float:
+    """Social determinant score shared by the structured and survival components"""
+    return (
+        EMPLOYMENT_RISK.get(patient_data.get('employment', 'Employed'), 1) +
+        EDUCATION_RISK.get(patient_data.get('education', 'College'), 0)
+    )
+
+
+def predict_structured(patient_data: Dict[str, Any]) -> float:
+    """Structured clinical score (notebook 06 `_predict_structured`)"""
+    return (
+        patient_data.get('phq9_score', 8) / 27 * 0.4 +
+        patient_data.get('gad7_score', 7) / 21 * 0.3 +
+        social_risk(patient_data) / 5 * 0.2 +
+        min(patient_data.get('age', 45) / 100, 1) * 0.1
+    )
+
+
+def predict_text(patient_data: Dict[str, Any]) -> Optional[float]:
+    """Clinical note score (notebook 06 `_predict_text`); None without a note"""
+    clinical_note = patient_data.get('clinical_note', '')
+    if not clinical_note:
+        return None
+
+    note_lower = clinical_note.lower()
+    negative_count = sum(1 for term in NEGATIVE_TERMS if term in note_lower)
+    positive_count = sum(1 for term in POSITIVE_TERMS if term in note_lower)
+
+    if negative_count + positive_count == 0:
+        return 0.5
+    return max(0.1, min(0.9, 0.5 + (negative_count - positive_count) * 0.2))
+
+
+def predict_survival(patient_data: Dict[str, Any]) -> float:
+    """Survival-based risk (notebook 06 `_predict_survival`)"""
+    comprehensive_score = (
+        patient_data.get('phq9_score', 8) * 0.4 +
+        patient_data.get('gad7_score', 7) * 0.3 +
+        social_risk(patient_data) * 0.2 +
+        (patient_data.get('age', 45) / 100) * 0.1
+    )
+    return min(0.95, comprehensive_score / 2)
+
+
+def default_components(structured: Callable[[Dict[str, Any]], float] = predict_structured,
+                       structured_budget_ms: float = 50) -> List[EnsembleComponent]:
+    return [
+        EnsembleComponent('structured_model', structured, weight=0.5, budget_ms=structured_budget_ms),
+        EnsembleComponent('text_model', predict_text, weight=0.3, budget_ms=100),
+        EnsembleComponent('survival_risk', predict_survival, weight=0.2, budget_ms=50)
+    ]
+
+
+def _timed(predict: Callable[[Dict[str, Any]], float], patient_data: Dict[str, Any]):
+    start = time.perf_counter()
+    score = predict(patient_data)
+    return score, (time.perf_counter() - start) * 1000
+
+
+class EnsemblePipeline:
+    """Concurrent multi-model risk ensemble
+
+    All components start at once, each on its own executor. Each result
+    is awaited only until that component's latency budget (measured from
+    request start) runs out; late or failing components are dropped and the
+    remaining weights are renormalised. Total latency is therefore bounded
+    by the slowest component that makes its budget, not the sum.
+
+    A running call cannot be cancelled, so a timed-out call keeps its
+    worker until it finishes. Each component therefore has max_concurrency
+    workers and as many slots; when all slots are held the component is
+    skipped for that request ('overloaded') instead of queueing. A slow
+    component sheds its own load and never delays the others, and no
+    call waits in a queue while its budget runs.
+    """
+
+    def __init__(self, components: List[EnsembleComponent] = None):
+        self.components = components or default_components()
+        self.executors = {
+            c.name: ThreadPoolExecutor(max_workers=c.max_concurrency, thread_name_prefix=f'ensemble-{c.name}')
+            for c in self.components
+        }
+        self.slots = {c.name: threading.BoundedSemaphore(c.max_concurrency) for c in self.components}
+
+    def _submit(self, component: EnsembleComponent, patient_data: Dict[str, Any]):
+        """Start a component call if it has a free slot, else None"""
+        slots = self.slots[component.name]
+        if not slots.acquire(blocking=False):
+            return None
+        future = self.executors[component.name].submit(_timed, component.predict, patient_data)
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def predict(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        futures = {component.name: self._submit(component, patient_data) for component in self.components}
+
+        breakdown, timings, skipped = {}, {}, {}
+        for component in sorted(self.components, key=lambda c: c.budget_ms):
+            future = futures[component.name]
+            if future is None:
+                skipped[component.name] = 'overloaded'
+                continue
+            remaining = component.budget_ms / 1000 - (time.perf_counter() - start)
+            try:
+                score, elapsed_ms = future.result(timeout=max(remaining, 0))
+            except FutureTimeout:
+                skipped[component.name] = 'timeout'
+                timings[component.name] = round((time.perf_counter() - start) * 1000, 3)
+                continue
+            except Exception as e:
+                skipped[component.name] = f'error: {e}'
+                continue
+
+            timings[component.name] = round(elapsed_ms, 3)
+            if score is None:
+                skipped[component.name] = 'no input'
+            else:
+                breakdown[component.name] = float(score)
+
+        weights = {c.name: c.weight for c in self.components if c.name in breakdown}
+        if weights:
+            total_weight = sum(weights.values())
+            weighted_sum = sum(breakdown[name] * weight for name, weight in weights.items()) / total_weight
+        else:
+            # Every component missed its budget: fall back to the inline clinical score
+            breakdown['fallback'] = weighted_sum = predict_structured(patient_data)
+
+        return {
+            'final_risk_score': min(0.99, max(0.01, weighted_sum)),
+            'model_breakdown': breakdown,
+            'skipped_components': skipped,
+            'component_timings_ms': timings,
+            'confidence': self.calculate_confidence(breakdown),
+            'total_latency_ms': round((time.perf_counter() - start) * 1000, 3)
+        }
+
+    @staticmethod
+    def calculate_confidence(breakdown: Dict[str, float]) -> float:
+        """Agreement-based confidence: higher variance means lower confidence"""
+        if len(breakdown) < 2:
+            return 0.5
+        return max(0.5, 1 - float(np.var(list(breakdown.values()))) * 2)
+
+    def shutdown(self):
+        for executor in self.executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
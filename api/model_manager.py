@@ -0,0 +1,375 @@
+import logging
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from feature_engineer import MentalHealthFeatureEngineer
+from patient_batch import PatientBatch, EMPLOYMENT_LEVELS, EDUCATION_LEVELS
+
+logger = logging.getLogger(__name__)
+
+# Raw training columns the notebook 03 preprocessor expects, with API defaults
+PATIENT_DEFAULTS = {
+    'age': 45, 'gender': 'Other', 'phq9_score': 0, 'gad7_score': 0,
+    'bp_systolic': 130, 'heart_rate': 75, 'bmi': 25,
+    'education': 'College', 'employment': 'Employed',
+    'data_source': 'i-Lit_Synthetic_v1.0', 'generation_date': ''
+}
+
+
+EMPLOYMENT_NAMES = np.array(EMPLOYMENT_LEVELS + ['Unknown'], dtype=object)
+EDUCATION_NAMES = np.array(EDUCATION_LEVELS + ['Unknown'], dtype=object)
+
+
+def patient_frame(patients: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Raw training columns for request dicts, built column by column"""
+    return pd.DataFrame({
+        column: [patient.get(column, default) for patient in patients]
+        for column, default in PATIENT_DEFAULTS.items()
+    })
+
+
+def batch_frame(batch: PatientBatch, rows: np.ndarray, source: Any) -> pd.DataFrame:
+    """Raw training columns for some rows of a PatientBatch
+
+    The validated inputs come from the batch columns; the remaining
+    training columns are read from source, the request dicts or cohort
+    DataFrame the batch was built from.
+    """
+    records = batch.records[rows]
+    columns = {
+        'phq9_score': records['phq9_score'], 'gad7_score': records['gad7_score'], 'age': records['age'],
+        'employment': EMPLOYMENT_NAMES[records['employment']],
+        'education': EDUCATION_NAMES[records['education']]
+    }
+    for column, default in PATIENT_DEFAULTS.items():
+        if column in columns:
+            continue
+        if isinstance(source, pd.DataFrame):
+            columns[column] = source[column].to_numpy()[rows] if column in source.columns else default
+        else:
+            columns[column] = [source[i].get(column, default) for i in rows]
+    return pd.DataFrame(columns, index=np.arange(len(rows)), columns=list(PATIENT_DEFAULTS))
+
+
+def package_predict(artifact: Any, patients: Any) -> np.ndarray:
+    """High-risk probability from a registered artifact
+
+    Accepts the notebook 03 package ({'model', 'preprocessor', ...}) or any
+    estimator/pipeline that takes the engineered feature frame directly.
+    patients is a list of request dicts or a frame of raw training columns
+    (patient_frame/batch_frame). Package features go through
+    MentalHealthFeatureEngineer.transform with the training statistics, so
+    a single patient is scored on exactly the features the model was
+    trained on.
+    """
+    frame = patients if isinstance(patients, pd.DataFrame) else patient_frame(patients)
+
+    if isinstance(artifact, dict):
+        return artifact['model'].predict_proba(package_engineer(artifact).transform(frame))[:, 1]
+
+    # Bare pipelines may carry their training PHQ-9 (mean, std) as phq9_stats_
+    engineer = MentalHealthFeatureEngineer()
+    engineered = engineer.calculate_statistical_features(
+        engineer.create_clinical_features(frame), getattr(artifact, 'phq9_stats_', None)
+    )
+    return artifact.predict_proba(engineered)[:, 1]
+
+
+def package_engineer(artifact: Dict[str, Any]) -> MentalHealthFeatureEngineer:
+    """Feature engineer around a package's fitted preprocessor (cached on the package)"""
+    engineer = artifact.get('_engineer')
+    if engineer is None:
+        engineer = MentalHealthFeatureEngineer()
+        engineer.preprocessor = artifact['preprocessor']
+        engineer.training_phq9_stats()
+        artifact['_engineer'] = engineer
+    return engineer
+
+
+def synthetic_patients(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Plausible payloads used to pre-warm a freshly loaded model"""
+    rng = random.Random(seed)
+    return [
+        {
+            'age': rng.randint(18, 90), 'gender': rng.choice(['Male', 'Female', 'Other']),
+            'phq9_score': rng.randint(0, 27), 'gad7_score': rng.randint(0, 21),
+            'bp_systolic': rng.uniform(100, 180), 'heart_rate': rng.uniform(50, 110),
+            'bmi': rng.uniform(17, 40),
+            'employment': rng.choice(EMPLOYMENT_LEVELS), 'education': rng.choice(EDUCATION_LEVELS)
+        }
+        for _ in range(n)
+    ]
+
+
+class ModelSlot(NamedTuple):
+    version: str
+    artifact: Any
+    metadata: Dict[str, Any]
+    loaded_at: str
+    warmup_ms: float
+
+
+class RoutingState(NamedTuple):
+    active: Optional[ModelSlot]
+    candidate: Optional[ModelSlot]
+    mode: Optional[str]  # None, 'canary' or 'shadow'
+    fraction: float
+
+
+class ModelManager:
+    """Serves registry models with background loading and atomic hot swap
+
+    New versions are loaded and pre-warmed (a few synthetic predictions) on
+    a background thread while the current version keeps serving. The whole
+    routing configuration is one immutable RoutingState that is replaced
+    in a single assignment, so requests see either the old or the new state
+    and never a half-loaded model. A candidate can also serve a canary
+    fraction of patients (bucketed by patient_id) or run in shadow mode,
+    where it scores off the request path and only disagreement is tracked.
+    At most shadow_queue_size shadow jobs are pending at once; beyond that
+    shadow scoring is skipped and counted as dropped, so a slow candidate
+    cannot grow memory under load.
+    """
+
+    def __init__(self, registry, name: str = 'risk_model',
+                 predict_fn: Callable[[Any, Any], np.ndarray] = package_predict,
+                 warmup_rows: int = 16, warmup_rounds: int = 3, shadow_queue_size: int = 64):
+        self.registry = registry
+        self.name = name
+        self.predict_fn = predict_fn
+        self.warmup_rows = warmup_rows
+        self.warmup_rounds = warmup_rounds
+        self.state = RoutingState(None, None, None, 0.0)
+        self.loading: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.shadow_stats = self._empty_shadow_stats()
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shadow')
+        self._shadow_slots = threading.BoundedSemaphore(shadow_queue_size)
+
+    @staticmethod
+    def _empty_shadow_stats() -> Dict[str, Any]:
+        return {'compared': 0, 'mean_abs_diff': 0.0, 'max_abs_diff': 0.0, 'dropped': 0}
+
+    def start(self) -> Optional[str]:
+        """Load the production/latest version synchronously at startup"""
+        try:
+            version = self.registry.resolve(self.name)
+            if version is None:
+                logger.info(f"No registered {self.name}; structured component uses the clinical formula")
+                return None
+            self.state = RoutingState(self._load(version), None, None, 0.0)
+            return version
+        except Exception as e:
+            self.last_error = str(e)
+            logger.warning(f"Could not load {self.name}: {e}")
+            return None
+
+    def _load(self, version: str) -> ModelSlot:
+        artifact, metadata = self.registry.load(self.name, version)
+        patients = synthetic_patients(self.warmup_rows)
+        start = time.perf_counter()
+        for _ in range(self.warmup_rounds):
+            self.predict_fn(artifact, patients)
+            self.predict_fn(artifact, patients[:1])
+        warmup_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Loaded and warmed {self.name} {metadata['version']} ({warmup_ms:.1f} ms)")
+        return ModelSlot(metadata['version'], artifact, metadata, datetime.now().isoformat(), round(warmup_ms, 3))
+
+    def deploy(self, version: Optional[str] = None, mode: str = 'swap', fraction: float = 0.1) -> str:
+        """Load a version in the background, then swap it in or stage it as canary/shadow"""
+        if mode not in ('swap', 'canary', 'shadow'):
+            raise ValueError(f"Unknown deployment mode: {mode}")
+        version = self.registry.resolve(self.name, version)
+        if version is None:
+            raise ValueError(f"No registered versions of {self.name}")
+        if version not in {v['version'] for v in self.registry.list_versions(self.name)}:
+            raise ValueError(f"Unknown version {version} of {self.name}")
+
+        def run():
+            try:
+                slot = self._load(version)
+            except Exception as e:
+                self.last_error = f"{version}: {e}"
+                logger.error(f"Loading {self.name} {version} failed: {e}")
+                return
+            finally:
+                self.loading = None
+
+            with self._lock:
+                current = self.state
+                if mode == 'swap':
+                    self.state = RoutingState(slot, None, None, 0.0)
+                    self.registry.set_alias(self.name, 'production', version)
+                else:
+                    with self._stats_lock:
+                        self.shadow_stats = self._empty_shadow_stats()
+                    self.state = RoutingState(current.active, slot, mode, fraction if mode == 'canary' else 0.0)
+            logger.info(f"{self.name} {version} deployed ({mode})")
+
+        self.loading = version
+        self._loader = threading.Thread(target=run, name=f'model-load-{version}', daemon=True)
+        self._loader.start()
+        return version
+
+    def promote(self) -> str:
+        """Make the canary/shadow candidate the active version"""
+        with self._lock:
+            candidate = self.state.candidate
+            if candidate is None:
+                raise ValueError('No candidate to promote')
+            self.state = RoutingState(candidate, None, None, 0.0)
+            self.registry.set_alias(self.name, 'production', candidate.version)
+        return candidate.version
+
+    def abort(self):
+        """Drop the candidate and route everything to the active version"""
+        with self._lock:
+            self.state = RoutingState(self.state.active, None, None, 0.0)
+
+    @staticmethod
+    def _bucket(patient_data: Dict[str, Any]) -> Optional[float]:
+        if 'patient_id' not in patient_data:
+            return None
+        return zlib.crc32(str(patient_data['patient_id']).encode()) % 10_000 / 10_000
+
+    def route(self, patient_data: Dict[str, Any], state: RoutingState = None) -> Optional[ModelSlot]:
+        """Slot serving this patient (canary routing is sticky per patient_id)"""
+        state = state or self.state
+        if state.mode == 'canary' and state.candidate is not None:
+            bucket = self._bucket(patient_data)
+            if bucket is not None and bucket < state.fraction:
+                return state.candidate
+        return state.active
+
+    def predict(self, patient_data: Dict[str, Any]) -> Optional[float]:
+        """Risk probability from the routed model, or None if no model is loaded"""
+        scored = self.predict_versioned(patient_data)
+        return None if scored is None else scored[0]
+
+    def predict_versioned(self, patient_data: Dict[str, Any]) -> Optional[Tuple[float, str]]:
+        """(risk probability, serving version) for one patient, or None if no model is loaded"""
+        scored = self.predict_many([patient_data])
+        if scored is None:
+            return None
+        scores, versions = scored
+        return float(scores[0]), versions[0]
+
+    def predict_many(self, patients: List[Dict[str, Any]]) -> Optional[Tuple[np.ndarray, List[str]]]:
+        """Scores and serving versions for a list of patients (one model call per routed slot)"""
+        state = self.state
+        if state.active is None:
+            return None
+
+        slots = [self.route(patient, state) for patient in patients]
+        scores = np.empty(len(patients), dtype=np.float64)
+        for slot in {id(slot): slot for slot in slots}.values():
+            rows = [i for i, routed in enumerate(slots) if routed is slot]
+            scores[rows] = self.predict_fn(slot.artifact, [patients[i] for i in rows])
+
+        if state.mode == 'shadow' and state.candidate is not None and patients:
+            self._submit_shadow(state.candidate, patients, scores)
+        return scores, [slot.version for slot in slots]
+
+    def predict_batch(self, batch: PatientBatch, patients: List[Dict[str, Any]],
+                      chunk_size: int = 4096) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Scores and serving versions for the valid patients of a batch, or None if no model is loaded
+
+        Canary routing is one bucket mask over the batch, and each routed
+        slot scores fixed-size chunks built from the batch columns, so no
+        per-patient dicts or whole-batch frame are created.
+        """
+        state = self.state
+        if state.active is None:
+            return None
+
+        rows = np.flatnonzero(batch.records['valid'])
+        canary = self._canary_mask(batch, patients, rows, state)
+        scores = np.empty(len(rows), dtype=np.float64)
+        versions = np.full(len(rows), state.active.version, dtype=object)
+        if canary.any():
+            versions[canary] = state.candidate.version
+
+        for slot, routed in ((state.active, ~canary), (state.candidate, canary)):
+            positions = np.flatnonzero(routed)
+            for start in range(0, len(positions), chunk_size):
+                chunk = positions[start:start + chunk_size]
+                frame = batch_frame(batch, rows[chunk], patients)
+                scores[chunk] = self.predict_fn(slot.artifact, frame)
+                if state.mode == 'shadow' and state.candidate is not None:
+                    self._submit_shadow(state.candidate, frame, scores[chunk])
+        return scores, versions
+
+    def _canary_mask(self, batch: PatientBatch, patients: List[Dict[str, Any]], rows: np.ndarray,
+                     state: RoutingState) -> np.ndarray:
+        """Rows routed to the canary candidate (same buckets as route)"""
+        if state.mode != 'canary' or state.candidate is None or not len(rows):
+            return np.zeros(len(rows), dtype=bool)
+        has_id = np.fromiter(('patient_id' in patients[i] for i in rows), dtype=bool, count=len(rows))
+        buckets = np.fromiter(
+            (zlib.crc32(str(patient_id).encode()) for patient_id in batch.patient_ids[rows]),
+            dtype=np.uint32, count=len(rows)
+        ) % 10_000 / 10_000
+        return has_id & (buckets < state.fraction)
+
+    def _submit_shadow(self, candidate: ModelSlot, patients: Any, served: np.ndarray):
+        if not self._shadow_slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.shadow_stats = {**self.shadow_stats, 'dropped': self.shadow_stats['dropped'] + len(patients)}
+            return
+        future = self._shadow_executor.submit(self._shadow, candidate, patients, served)
+        future.add_done_callback(lambda _: self._shadow_slots.release())
+
+    def _shadow(self, candidate: ModelSlot, patients: Any, served: np.ndarray):
+        try:
+            diffs = np.abs(np.asarray(self.predict_fn(candidate.artifact, patients), dtype=np.float64) - served)
+        except Exception as e:
+            logger.warning(f"Shadow prediction failed: {e}")
+            return
+        with self._stats_lock:
+            stats = self.shadow_stats
+            n = stats['compared'] + len(diffs)
+            self.shadow_stats = {
+                **stats,
+                'compared': n,
+                'mean_abs_diff': stats['mean_abs_diff'] + float(diffs.sum() - len(diffs) * stats['mean_abs_diff']) / n,
+                'max_abs_diff': max(stats['max_abs_diff'], float(diffs.max()))
+            }
+
+    def version_for(self, patient_data: Dict[str, Any], default: str = '1.0') -> str:
+        slot = self.route(patient_data)
+        return slot.version if slot is not None else default
+
+    def status(self) -> Dict[str, Any]:
+        state = self.state
+
+        def describe(slot: Optional[ModelSlot]):
+            if slot is None:
+                return None
+            return {
+                'version': slot.version, 'loaded_at': slot.loaded_at, 'warmup_ms': slot.warmup_ms,
+                'model_name': slot.metadata.get('model_name')
+            }
+
+        return {
+            'name': self.name,
+            'active': describe(state.active),
+            'candidate': describe(state.candidate),
+            'mode': state.mode,
+            'canary_fraction': state.fraction,
+            'loading': self.loading,
+            'last_error': self.last_error,
+            'shadow': self.shadow_stats if state.mode == 'shadow' else None,
+            'registered_versions': [v['version'] for v in self.registry.list_versions(self.name)],
+            'aliases': self.registry.aliases(self.name)
+        }
@@ -0,0 +1,219 @@
+import bisect
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+# Social determinant lookups shared with MentalHealthAPI.extract_features
+EMPLOYMENT_RISK = {"Employed": 0, "Unemployed": 2, "Disabled": 3, "Student": 1, "Retired": 1}
+EDUCATION_RISK = {"High School": 1, "College": 0, "Graduate": 0, "Other": 1}
+
+EMPLOYMENT_LEVELS = list(EMPLOYMENT_RISK)
+EDUCATION_LEVELS = list(EDUCATION_RISK)
+
+# Unknown levels get the last code, scored like extract_features' .get() defaults
+EMPLOYMENT_CODES = {level: code for code, level in enumerate(EMPLOYMENT_LEVELS)}
+EDUCATION_CODES = {level: code for code, level in enumerate(EDUCATION_LEVELS)}
+EMPLOYMENT_CODE_RISK = np.array(list(EMPLOYMENT_RISK.values()) + [1], dtype=np.float64)
+EDUCATION_CODE_RISK = np.array(list(EDUCATION_RISK.values()) + [0], dtype=np.float64)
+
+RISK_CATEGORIES = ['Low Risk', 'Moderate Risk', 'High Risk', 'Very High Risk']
+RISK_CUTOFF_VALUES = (0.3, 0.6, 0.8)
+RISK_CUTOFFS = np.array(RISK_CUTOFF_VALUES)
+RISK_RECOMMENDATIONS = [
+    [
+        "Routine monitoring",
+        "Maintain current support systems",
+        "Preventive mental health education",
+        "Regular check-ins"
+    ],
+    [
+        "Regular follow-up in 1-2 weeks",
+        "Continue current treatment plan",
+        "Monitor symptom progression",
+        "Provide coping strategy resources"
+    ],
+    [
+        "Schedule urgent follow-up within 48 hours",
+        "Increase therapy session frequency",
+        "Consider medication evaluation",
+        "Develop crisis management plan"
+    ],
+    [
+        "Immediate clinical assessment required",
+        "Consider crisis intervention services",
+        "Frequent monitoring recommended",
+        "Safety planning with patient"
+    ]
+]
+
+# ~36 bytes per patient (plus one pointer for the echoed patient_id). Inputs
+# stay float64 so batch scores are bit-identical to the scalar /predict path.
+PATIENT_DTYPE = np.dtype([
+    ('phq9_score', np.float64),
+    ('gad7_score', np.float64),
+    ('age', np.float64),
+    ('employment', np.uint8),
+    ('education', np.uint8),
+    ('valid', np.bool_),
+    ('risk_category', np.uint8),
+    ('risk_score', np.float64)
+])
+
+# Constant response pieces are JSON-encoded once at import time
+CATEGORY_FRAGMENTS = [json.dumps(category) for category in RISK_CATEGORIES]
+RECOMMENDATION_FRAGMENTS = [json.dumps(recommendations) for recommendations in RISK_RECOMMENDATIONS]
+
+
+def risk_category_code(risk_score: float) -> int:
+    """Index into RISK_CATEGORIES for one score"""
+    return bisect.bisect_right(RISK_CUTOFF_VALUES, risk_score)
+
+
+def risk_category_codes(risk_scores: np.ndarray) -> np.ndarray:
+    """Vectorised risk_category_code"""
+    return np.searchsorted(RISK_CUTOFFS, risk_scores, side='right').astype(np.uint8)
+
+
+def prediction_fragment(risk_score: float, code: int, timestamp: str, model_version: str = '1.0',
+                        patient_id: str = None, extra: str = '') -> str:
+    """Encode one prediction from preencoded fragments
+
+    timestamp and patient_id are already JSON-encoded; extra is a string of
+    additional ',"key":value' pairs appended after the standard fields.
+    """
+    prefix = f'"patient_id":{patient_id},' if patient_id is not None else ''
+    return (
+        f'{{"confidence":0.85,"model_version":{json.dumps(model_version)},{prefix}'
+        f'"recommendations":{RECOMMENDATION_FRAGMENTS[code]},'
+        f'"risk_category":{CATEGORY_FRAGMENTS[code]},'
+        f'"risk_score":{risk_score!r},'
+        f'"timestamp":{timestamp}{extra}}}'
+    )
+
+
+def encode_extra(extra: Dict[str, str] = None) -> str:
+    """',"key":value' pairs for already-encoded extra values"""
+    return ''.join(f',{json.dumps(key)}:{value}' for key, value in (extra or {}).items())
+
+
+class PatientBatch:
+    """Column-oriented batch of patients for bulk scoring
+
+    Inputs are packed into a NumPy structured array with categorical codes
+    for employment, education and risk category. Scoring is vectorised and
+    responses are streamed from preencoded JSON fragments, so no
+    per-patient feature or response dicts are built.
+    """
+
+    def __init__(self, records: np.ndarray, patient_ids: np.ndarray, errors: Dict[int, str] = None):
+        self.records = records
+        self.patient_ids = patient_ids
+        self.errors = errors or {}
+        self.model_version = '1.0'
+        self.model_versions = None
+        self.extras: Dict[int, str] = {}
+        self.timestamp = datetime.now().isoformat()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @classmethod
+    def from_columns(cls, patient_ids: Iterable, phq9_score, gad7_score, age=45.0,
+                     employment=None, education=None) -> 'PatientBatch':
+        """Build a batch directly from column arrays (e.g. a DataFrame)"""
+        patient_ids = np.asarray(patient_ids, dtype=object)
+        records = np.zeros(len(patient_ids), dtype=PATIENT_DTYPE)
+        records['phq9_score'] = phq9_score
+        records['gad7_score'] = gad7_score
+        records['age'] = age
+        records['employment'] = cls.encode(employment, EMPLOYMENT_CODES, 'Employed', len(patient_ids))
+        records['education'] = cls.encode(education, EDUCATION_CODES, 'College', len(patient_ids))
+        records['valid'] = True
+        return cls(records, patient_ids)
+
+    @staticmethod
+    def encode(values, codes: Dict[str, int], default: str, size: int) -> np.ndarray:
+        """Map category labels to codes (unknown -> len(codes), missing -> default)"""
+        if values is None:
+            return np.full(size, codes[default], dtype=np.uint8)
+        default_code, unknown_code = codes[default], len(codes)
+
+        def code(value) -> int:
+            if value is None or (isinstance(value, float) and value != value):
+                return default_code
+            return codes.get(value, unknown_code) if isinstance(value, str) else unknown_code
+
+        return np.fromiter((code(value) for value in values), dtype=np.uint8, count=size)
+
+    def score(self) -> 'PatientBatch':
+        """Vectorised MentalHealthAPI.calculate_risk_score"""
+        records = self.records
+        social_risk = (
+            EMPLOYMENT_CODE_RISK[records['employment']] +
+            EDUCATION_CODE_RISK[records['education']]
+        )
+        risk_score = (
+            records['phq9_score'] / 27 * 0.4 +
+            records['gad7_score'] / 21 * 0.3 +
+            social_risk / 5 * 0.2 +
+            np.minimum(records['age'] / 100, 1) * 0.1
+        )
+        records['risk_score'] = np.clip(risk_score, 0.05, 0.95)
+        records['risk_category'] = risk_category_codes(records['risk_score'])
+        return self
+
+    def apply_scores(self, risk_scores: np.ndarray, model_versions: List[str] = None) -> 'PatientBatch':
+        """Replace the valid patients' scores (in row order) with model scores"""
+        valid = self.records['valid']
+        self.records['risk_score'][valid] = risk_scores
+        self.records['risk_category'][valid] = risk_category_codes(np.asarray(risk_scores))
+        if model_versions is not None:
+            self.model_versions = np.full(len(self), self.model_version, dtype=object)
+            self.model_versions[valid] = model_versions
+        return self
+
+    def attach_extras(self, extras: Dict[int, Dict[str, str]]) -> 'PatientBatch':
+        """Per-patient pre-encoded extra response fields (e.g. trajectory), keyed by row"""
+        self.extras = {index: encode_extra(extra) for index, extra in extras.items()}
+        return self
+
+    def _prediction_fragment(self, index: int, valid: bool, code: int, risk_score: float,
+                             patient_id: str = None, extra: str = '') -> str:
+        if valid:
+            model_version = self.model_version if self.model_versions is None else self.model_versions[index]
+            return prediction_fragment(
+                risk_score, code, self._timestamp, model_version, patient_id, extra
+            )
+        prefix = f'"patient_id":{patient_id},' if patient_id is not None else ''
+        return (
+            f'{{"error":{json.dumps(self.errors.get(index, "invalid input"))},'
+            f'{prefix}"risk_category":"Unknown","risk_score":0.5{extra}}}'
+        )
+
+    @property
+    def _timestamp(self) -> str:
+        return json.dumps(self.timestamp)
+
+    def iter_json(self, chunk_size: int = 4096) -> Iterator[str]:
+        """Stream the /batch_predict response body without per-patient dicts"""
+        yield '{"predictions":['
+        records = self.records
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            parts = [
+                self._prediction_fragment(
+                    start + offset, valid, code, risk_score,
+                    patient_id=json.dumps(self.patient_ids[start + offset], default=str),
+                    extra=self.extras.get(start + offset, '')
+                )
+                for offset, (valid, code, risk_score) in enumerate(zip(
+                    chunk['valid'].tolist(), chunk['risk_category'].tolist(), chunk['risk_score'].tolist()
+                ))
+            ]
+            yield (',' if start else '') + ','.join(parts)
+        yield f'],"timestamp":{self._timestamp},"total_patients":{len(records)}}}'
+
+    def to_json(self) -> str:
+        return ''.join(self.iter_json())
@@ -0,0 +1,209 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from patient_batch import (
+    PatientBatch, EMPLOYMENT_LEVELS, EDUCATION_LEVELS, EMPLOYMENT_CODES, EDUCATION_CODES
+)
+
+try:
+    import orjson
+except ImportError:  # optional fast codec; stdlib json is the fallback
+    orjson = None
+
+
+def loads(raw: bytes) -> Any:
+    """Decode a request body"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dumps(obj: Any) -> str:
+    """Compact JSON encoding for non-constant response values"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(obj, separators=(',', ':'), default=str)
+
+
+@dataclass(frozen=True)
+class Field:
+    """Declarative description of one request field"""
+    name: str
+    required: bool = False
+    default: Any = None
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    choices: Optional[Sequence[str]] = None
+
+
+def _as_number(value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return np.nan
+    return float(value)
+
+
+class PatientSchema:
+    """Patient request schema compiled once into fast checks
+
+    `validate` checks a single record; `to_batch` decodes a list of records
+    straight into a PatientBatch, applying range and enum checks to whole
+    columns at once. Invalid patients are flagged in the batch and reported
+    per patient, as /batch_predict always has.
+    """
+
+    def __init__(self, fields: List[Field]):
+        self.fields = fields
+        self.required = tuple(field.name for field in fields if field.required)
+        self.numeric = tuple(
+            field for field in fields if field.minimum is not None or field.maximum is not None
+        )
+        self.enums = {field.name: frozenset(field.choices) for field in fields if field.choices}
+        self.defaults = {field.name: field.default for field in fields}
+        self._messages = {
+            field.name: (
+                f'{field.name} must be a number between {field.minimum} and {field.maximum}'
+                if field.choices is None else
+                f'{field.name} must be one of: {", ".join(field.choices)}'
+            )
+            for field in fields
+        }
+
+    def validate(self, record: Any) -> Optional[str]:
+        """Return an error message for an invalid record, else None
+        
+        Null enum values are normalised to the field default in place,
+        matching how to_batch encodes them.
+        """
+        if not isinstance(record, dict):
+            return 'Patient record must be a JSON object'
+        for name in self.required:
+            if name not in record:
+                return f'Missing required field: {name}'
+        for field in self.numeric:
+            value = _as_number(record.get(field.name, field.default))
+            if not field.minimum <= value <= field.maximum:
+                return self._messages[field.name]
+        for name, choices in self.enums.items():
+            value = record.get(name)
+            if value is None:
+                if name in record:
+                    record[name] = self.defaults[name]
+            elif not isinstance(value, str) or value not in choices:
+                return self._messages[name]
+        return None
+
+    def _column(self, patients: List[Any], name: str) -> list:
+        default = self.defaults[name]
+        return [
+            patient.get(name, default) if isinstance(patient, dict) else default
+            for patient in patients
+        ]
+
+    def to_batch(self, patients: List[Any]) -> PatientBatch:
+        """Decode and validate a list of patient records into a PatientBatch"""
+        n = len(patients)
+        errors: Dict[int, str] = {}
+
+        # Per-record structural checks (cheap membership tests only)
+        for index, patient in enumerate(patients):
+            if not isinstance(patient, dict):
+                errors[index] = 'Patient record must be a JSON object'
+                continue
+            for name in self.required:
+                if name not in patient:
+                    errors[index] = f'Missing required field: {name}'
+                    break
+            # Null enums mean "not provided", as in validate
+            for name in self.enums:
+                if name in patient and patient[name] is None:
+                    patient[name] = self.defaults[name]
+
+        numeric = {
+            field.name: np.fromiter(
+                (_as_number(value) for value in self._column(patients, field.name)),
+                dtype=np.float64, count=n
+            )
+            for field in self.numeric
+        }
+        patient_ids = [
+            patient.get('patient_id', 'unknown') if isinstance(patient, dict) else 'unknown'
+            for patient in patients
+        ]
+        return self._build(
+            patient_ids, numeric,
+            self._column(patients, 'employment'), self._column(patients, 'education'),
+            errors
+        )
+
+    def frame_to_batch(self, df: pd.DataFrame, patient_ids=None) -> PatientBatch:
+        """Validate a DataFrame (e.g. a cohort extract) into a PatientBatch"""
+        errors: Dict[int, str] = {}
+        for name in self.required:
+            if name not in df.columns:
+                raise ValueError(f'Missing required column: {name}')
+
+        numeric = {}
+        for field in self.numeric:
+            if field.name in df.columns:
+                values = pd.to_numeric(df[field.name], errors='coerce').to_numpy(dtype=np.float64)
+                if not field.required:
+                    values = np.where(df[field.name].isna().to_numpy(), field.default, values)
+            else:
+                values = np.full(len(df), field.default, dtype=np.float64)
+            numeric[field.name] = values
+
+        if patient_ids is None:
+            patient_ids = df['patient_id'] if 'patient_id' in df.columns else np.arange(len(df))
+        return self._build(
+            patient_ids, numeric,
+            df['employment'] if 'employment' in df.columns else None,
+            df['education'] if 'education' in df.columns else None,
+            errors
+        )
+
+    def _build(self, patient_ids, numeric: Dict[str, np.ndarray], employment, education,
+               errors: Dict[int, str]) -> PatientBatch:
+        """Column-wise range and enum checks, then pack the batch"""
+        invalid = np.zeros(len(patient_ids), dtype=bool)
+        invalid[list(errors)] = True
+
+        for field in self.numeric:
+            values = numeric[field.name]
+            bad = ~((values >= field.minimum) & (values <= field.maximum)) & ~invalid
+            for index in np.flatnonzero(bad):
+                errors[int(index)] = self._messages[field.name]
+            invalid |= bad
+            numeric[field.name] = np.where(invalid, 0, values)
+
+        batch = PatientBatch.from_columns(
+            patient_ids, numeric['phq9_score'], numeric['gad7_score'], numeric['age'],
+            employment, education
+        )
+
+        for name, codes in (('employment', EMPLOYMENT_CODES), ('education', EDUCATION_CODES)):
+            bad = (batch.records[name] == len(codes)) & ~invalid
+            for index in np.flatnonzero(bad):
+                errors[int(index)] = self._messages[name]
+            invalid |= bad
+
+        batch.records['valid'] = ~invalid
+        batch.errors = errors
+        return batch
+
+
+PATIENT_SCHEMA = PatientSchema([
+    Field('phq9_score', required=True, minimum=0, maximum=27),
+    Field('gad7_score', required=True, minimum=0, maximum=21),
+    Field('age', default=45, minimum=0, maximum=120),
+    Field('employment', default='Employed', choices=EMPLOYMENT_LEVELS),
+    Field('education', default='College', choices=EDUCATION_LEVELS)
+])
+
+# Longitudinal assessments (POST /assessments) share the PATIENT_SCHEMA score ranges
+ASSESSMENT_SCHEMA = PatientSchema([Field('patient_id', required=True)] + [
+    field for field in PATIENT_SCHEMA.fields if field.name in ('phq9_score', 'gad7_score')
+])
@@ -0,0 +1,257 @@
+import numbers
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+
+SECONDS_PER_DAY = 86400.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    patient_id TEXT NOT NULL,
+    assessed_at REAL NOT NULL,
+    phq9_score REAL NOT NULL,
+    gad7_score REAL NOT NULL,
+    PRIMARY KEY (patient_id, assessed_at)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS trajectories (
+    patient_id TEXT PRIMARY KEY,
+    n_assessments INTEGER NOT NULL,
+    first_at REAL NOT NULL,
+    last_at REAL NOT NULL,
+    last_phq9 REAL NOT NULL,
+    last_gad7 REAL NOT NULL,
+    phq9_delta REAL,
+    gad7_delta REAL,
+    sum_t REAL NOT NULL,
+    sum_tt REAL NOT NULL,
+    sum_phq9 REAL NOT NULL,
+    sum_t_phq9 REAL NOT NULL,
+    sum_gad7 REAL NOT NULL,
+    sum_t_gad7 REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+TRAJECTORY_COLUMNS = [
+    'patient_id', 'n_assessments', 'first_at', 'last_at', 'last_phq9', 'last_gad7',
+    'phq9_delta', 'gad7_delta', 'sum_t', 'sum_tt', 'sum_phq9', 'sum_t_phq9',
+    'sum_gad7', 'sum_t_gad7'
+]
+
+
+def _to_epoch(timestamp):
+    """
+    Convert datetime / ISO string / epoch seconds to epoch seconds (UTC)
+    """
+    if timestamp is None:
+        return datetime.now(timezone.utc).timestamp()
+    if isinstance(timestamp, numbers.Real):
+        return float(timestamp)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+class AssessmentStore:
+    """
+    Append-only store of repeated PHQ-9/GAD-7 assessments
+
+    Assessments are indexed by (patient_id, assessed_at). A per-patient
+    trajectory row keeps running sums for the least-squares slope, so
+    trajectory features are updated in O(1) on insert and read with a
+    single primary-key lookup at scoring time.
+    """
+
+    def __init__(self, db_path=':memory:'):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if db_path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def add_assessment(self, patient_id, phq9_score, gad7_score, assessed_at=None):
+        """
+        Append one assessment and update the patient's trajectory
+
+        Idempotent: re-sending an assessment already stored for the same
+        (patient_id, assessed_at) leaves the store unchanged.
+        """
+        return self.add_assessment_records([{
+            'patient_id': patient_id, 'phq9_score': phq9_score,
+            'gad7_score': gad7_score, 'assessed_at': assessed_at
+        }])[0]
+
+    def add_assessment_records(self, records):
+        """
+        Append several assessments in a single transaction
+
+        Either every record is stored or (on error) none are, so a failed
+        request can simply be retried. Returns the trajectory features after
+        each record, with 'duplicate' set for records that were already stored.
+        """
+        with self._lock, self._conn:
+            return [
+                self._insert(
+                    str(record['patient_id']), _to_epoch(record.get('assessed_at')),
+                    float(record['phq9_score']), float(record['gad7_score'])
+                )
+                for record in records
+            ]
+
+    def add_assessments(self, df):
+        """
+        Append assessments from a DataFrame (patient_id, phq9_score, gad7_score, assessed_at)
+        """
+        ordered = df.sort_values('assessed_at') if 'assessed_at' in df.columns else df
+        self.add_assessment_records(ordered.to_dict('records'))
+        return len(ordered)
+
+    def _insert(self, patient_id, assessed_at, phq9, gad7):
+        inserted = self._conn.execute(
+            'INSERT OR IGNORE INTO assessments VALUES (?, ?, ?, ?)',
+            (patient_id, assessed_at, phq9, gad7)
+        ).rowcount
+        state = self._conn.execute(
+            'SELECT * FROM trajectories WHERE patient_id = ?', (patient_id,)
+        ).fetchone()
+
+        if not inserted:
+            return {**self._features(state), 'duplicate': True}
+
+        if state is not None and assessed_at < state['last_at']:
+            # Back-filled assessment: running sums are order-independent but
+            # latest/delta are not, so rebuild this patient from history
+            state = self._rebuild(patient_id)
+        else:
+            state = self._extend(patient_id, state, assessed_at, phq9, gad7)
+
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO trajectories VALUES ({', '.join('?' * len(TRAJECTORY_COLUMNS))})",
+            [state[column] for column in TRAJECTORY_COLUMNS]
+        )
+        return {**self._features(state), 'duplicate': False}
+
+    def _extend(self, patient_id, state, assessed_at, phq9, gad7):
+        if state is None:
+            return {
+                'patient_id': patient_id, 'n_assessments': 1,
+                'first_at': assessed_at, 'last_at': assessed_at,
+                'last_phq9': phq9, 'last_gad7': gad7,
+                'phq9_delta': None, 'gad7_delta': None,
+                'sum_t': 0.0, 'sum_tt': 0.0,
+                'sum_phq9': phq9, 'sum_t_phq9': 0.0,
+                'sum_gad7': gad7, 'sum_t_gad7': 0.0
+            }
+
+        # Time in days since the first assessment keeps the sums well scaled
+        t = (assessed_at - state['first_at']) / SECONDS_PER_DAY
+        return {
+            'patient_id': patient_id,
+            'n_assessments': state['n_assessments'] + 1,
+            'first_at': state['first_at'],
+            'last_at': assessed_at,
+            'last_phq9': phq9,
+            'last_gad7': gad7,
+            'phq9_delta': phq9 - state['last_phq9'],
+            'gad7_delta': gad7 - state['last_gad7'],
+            'sum_t': state['sum_t'] + t,
+            'sum_tt': state['sum_tt'] + t * t,
+            'sum_phq9': state['sum_phq9'] + phq9,
+            'sum_t_phq9': state['sum_t_phq9'] + t * phq9,
+            'sum_gad7': state['sum_gad7'] + gad7,
+            'sum_t_gad7': state['sum_t_gad7'] + t * gad7
+        }
+
+    def _rebuild(self, patient_id):
+        state = None
+        rows = self._conn.execute(
+            'SELECT assessed_at, phq9_score, gad7_score FROM assessments '
+            'WHERE patient_id = ? ORDER BY assessed_at', (patient_id,)
+        )
+        for assessed_at, phq9, gad7 in rows:
+            state = self._extend(patient_id, state, assessed_at, phq9, gad7)
+        return state
+
+    @staticmethod
+    def _slope(n, sum_t, sum_tt, sum_y, sum_ty):
+        denominator = n * sum_tt - sum_t * sum_t
+        if n < 2 or denominator <= 0:
+            return None
+        # Least-squares slope in points per day, reported per week
+        return (n * sum_ty - sum_t * sum_y) / denominator * 7
+
+    def _features(self, state, as_of=None):
+        as_of = _to_epoch(as_of)
+        n = state['n_assessments']
+        return {
+            'patient_id': state['patient_id'],
+            'n_assessments': n,
+            'latest_phq9': state['last_phq9'],
+            'latest_gad7': state['last_gad7'],
+            'phq9_delta': state['phq9_delta'],
+            'gad7_delta': state['gad7_delta'],
+            'phq9_slope_per_week': self._slope(
+                n, state['sum_t'], state['sum_tt'], state['sum_phq9'], state['sum_t_phq9']
+            ),
+            'gad7_slope_per_week': self._slope(
+                n, state['sum_t'], state['sum_tt'], state['sum_gad7'], state['sum_t_gad7']
+            ),
+            'days_since_last': max(0.0, (as_of - state['last_at']) / SECONDS_PER_DAY),
+            'last_assessed_at': datetime.fromtimestamp(state['last_at'], timezone.utc).isoformat()
+        }
+
+    def get_trajectory(self, patient_id, as_of=None):
+        """
+        Trajectory features for one patient (None if never assessed)
+        """
+        with self._lock:
+            state = self._conn.execute(
+                'SELECT * FROM trajectories WHERE patient_id = ?', (str(patient_id),)
+            ).fetchone()
+        return None if state is None else self._features(state, as_of)
+
+    def get_trajectories(self, patient_ids, as_of=None):
+        """
+        Trajectory features for many patients, keyed by patient_id (assessed patients only)
+        """
+        ids = list(dict.fromkeys(str(patient_id) for patient_id in patient_ids))
+        rows = []
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                rows.extend(self._conn.execute(
+                    f"SELECT * FROM trajectories WHERE patient_id IN ({', '.join('?' * len(batch))})",
+                    batch
+                ).fetchall())
+        return {row['patient_id']: self._features(row, as_of) for row in rows}
+
+    def trajectory_frame(self, patient_ids=None, as_of=None):
+        """
+        Trajectory features for many patients as a DataFrame
+        """
+        if patient_ids is not None:
+            return pd.DataFrame(list(self.get_trajectories(patient_ids, as_of).values()))
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM trajectories').fetchall()
+        return pd.DataFrame([self._features(row, as_of) for row in rows])
+
+    def history(self, patient_id):
+        """
+        Full assessment history for one patient, oldest first
+        """
+        with self._lock:
+            history = pd.read_sql_query(
+                'SELECT * FROM assessments WHERE patient_id = ? ORDER BY assessed_at',
+                self._conn, params=(str(patient_id),)
+            )
+        history['assessed_at'] = pd.to_datetime(history['assessed_at'], unit='s', utc=True)
+        return history
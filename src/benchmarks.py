@@ -0,0 +1,88 @@
+import time
+import tracemalloc
+
+import pandas as pd
+from scipy import sparse
+
+from config import DATA_RAW_PATH
+from feature_engineer import MentalHealthFeatureEngineer, analyze_feature_importance
+
+
+def load_scaled_cohort(n_rows, data_path=DATA_RAW_PATH, random_state=42):
+    """
+    Resample the synthetic cohort (with replacement) up to n_rows
+    """
+    df = pd.read_csv(data_path)
+    return df.sample(n_rows, replace=True, random_state=random_state).reset_index(drop=True)
+
+
+def matrix_nbytes(X):
+    """
+    Memory held by a dense array or a CSR/CSC matrix
+    """
+    if sparse.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def _timed(func, *args, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmark_sparse_vs_dense(n_rows=1_000_000, model_factory=None, df=None):
+    """
+    Compare dense and sparse feature pipelines end to end
+
+    Measures matrix size, peak traced memory and wall time for feature
+    engineering, model training, F-test importance and scoring.
+    """
+    if model_factory is None:
+        from sklearn.linear_model import LogisticRegression
+        model_factory = lambda: LogisticRegression(max_iter=200, class_weight='balanced')
+
+    if df is None:
+        df = load_scaled_cohort(n_rows)
+
+    rows = []
+    for mode in ['dense', 'sparse']:
+        print(f"\n{'='*40}\nBenchmarking {mode} pipeline ({len(df):,} rows)\n{'='*40}")
+        engineer = MentalHealthFeatureEngineer(sparse=(mode == 'sparse'))
+
+        (X, y, feature_names, _), fe_time, fe_peak = _timed(engineer.fit_transform, df)
+        model = model_factory()
+        _, train_time, train_peak = _timed(model.fit, X, y)
+        _, importance_time, _ = _timed(analyze_feature_importance, X, y, feature_names)
+        _, score_time, _ = _timed(model.predict_proba, X)
+
+        rows.append({
+            'mode': mode,
+            'format': 'csr' if sparse.issparse(X) else 'dense',
+            'rows': X.shape[0],
+            'features': X.shape[1],
+            'matrix_mb': matrix_nbytes(X) / 1e6,
+            'feature_peak_mb': fe_peak / 1e6,
+            'train_peak_mb': train_peak / 1e6,
+            'feature_time_s': fe_time,
+            'train_time_s': train_time,
+            'importance_time_s': importance_time,
+            'score_time_s': score_time
+        })
+
+    results = pd.DataFrame(rows).set_index('mode')
+    print("\nSparse vs dense:")
+    print(results.round(3).T)
+    measures = results.columns.drop(['format', 'rows', 'features'])
+    ratios = results.loc['sparse', measures].astype(float) / results.loc['dense', measures].astype(float)
+    print("\nSparse / dense ratio:")
+    print(ratios.round(3).to_string())
+    return results
+
+
+if __name__ == '__main__':
+    benchmark_sparse_vs_dense()
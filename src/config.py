@@ -6,6 +6,10 @@ DESCRIPTION = "AI-Powered Mental Health Risk Stratification System"
 # Data paths
 DATA_RAW_PATH = "../data/raw/synthetic_mh_data.csv"
 DATA_PROCESSED_PATH = "../data/processed/cleaned_mh_data.csv"
+ASSESSMENT_DB_PATH = "../data/processed/assessments.db"
+DRIFT_REFERENCE_PATH = "../models/drift_reference.json"
+MODEL_REGISTRY_PATH = "../models/registry"
+BEST_MODEL_PATH = "../models/best_risk_model.pkl"
 
 # Model parameters
 RISK_THRESHOLDS = {
@@ -1,23 +1,36 @@
 import pandas as pd
 import numpy as np
+from scipy import sparse as sp
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.impute import SimpleImputer
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.feature_selection import f_classif
 import warnings
 warnings.filterwarnings('ignore')
 
+# CSR stores a float64 value plus an int32 column index per non-zero, so it
+# is only smaller than the dense matrix below 8 / 12 density
+CSR_BREAK_EVEN_DENSITY = 2 / 3
+
+
 class MentalHealthFeatureEngineer:
     """
     Feature engineering pipeline for mental health risk prediction
     Incorporates biostatistical principles
+    
+    With sparse=True the one-hot block is kept sparse and, when that makes
+    the processed matrix smaller (density below CSR_BREAK_EVEN_DENSITY),
+    it is returned as CSR, which scikit-learn models and
+    analyze_feature_importance consume without densifying. Otherwise the
+    dense matrix is returned.
     """
     
-    def __init__(self):
+    def __init__(self, sparse=False):
+        self.sparse = sparse
         self.numeric_features = None
         self.categorical_features = None
         self.preprocessor = None
+        self.phq9_stats = None
         
     def create_clinical_features(self, df):
         """
@@ -80,16 +93,20 @@ class MentalHealthFeatureEngineer:
         
         return df_engineered
     
-    def calculate_statistical_features(self, df):
+    def calculate_statistical_features(self, df, phq9_stats=None):
         """
         Create statistical features that might capture complex relationships
+        
+        phq9_stats=(mean, std) standardises PHQ-9 against fixed (training)
+        statistics; by default they are computed from df itself.
         """
         df_stats = df.copy()
         
         # Z-scores for outlier detection
-        df_stats['phq9_zscore'] = (
-            (df['phq9_score'] - df['phq9_score'].mean()) / df['phq9_score'].std()
-        )
+        if phq9_stats is None:
+            phq9_stats = (df['phq9_score'].mean(), df['phq9_score'].std())
+        phq9_mean, phq9_std = phq9_stats
+        df_stats['phq9_zscore'] = (df['phq9_score'] - phq9_mean) / phq9_std
         
         # Polynomial features for non-linear relationships
         df_stats['age_squared'] = df['age'] ** 2
@@ -120,15 +137,16 @@ class MentalHealthFeatureEngineer:
         
         categorical_transformer = Pipeline(steps=[
             ('imputer', SimpleImputer(strategy='constant', fill_value='missing')),
-            ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
+            ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=self.sparse))
         ])
         
-        # Create preprocessor
+        # Create preprocessor (in sparse mode, stacked as CSR only when it is smaller)
         self.preprocessor = ColumnTransformer(
             transformers=[
                 ('num', numeric_transformer, self.numeric_features),
                 ('cat', categorical_transformer, self.categorical_features)
-            ]
+            ],
+            sparse_threshold=CSR_BREAK_EVEN_DENSITY if self.sparse else 0.0
         )
         
         return self.preprocessor
@@ -143,8 +161,9 @@ class MentalHealthFeatureEngineer:
         df_engineered = self.create_clinical_features(df)
         print("✓ Clinical features created")
         
-        # Step 2: Create statistical features
-        df_engineered = self.calculate_statistical_features(df_engineered)
+        # Step 2: Create statistical features (training statistics kept for transform)
+        self.phq9_stats = (float(df_engineered['phq9_score'].mean()), float(df_engineered['phq9_score'].std()))
+        df_engineered = self.calculate_statistical_features(df_engineered, self.phq9_stats)
         print("✓ Statistical features created")
         
         # Separate features and target
@@ -153,7 +172,7 @@ class MentalHealthFeatureEngineer:
         
         # Step 3: Create and fit preprocessor
         self.preprocessor = self.create_preprocessor(X)
-        X_processed = self.preprocessor.fit_transform(X)
+        X_processed = self._as_output(self.preprocessor.fit_transform(X))
         print("✓ Preprocessing completed")
         
         # Get feature names after preprocessing
@@ -173,14 +192,49 @@ class MentalHealthFeatureEngineer:
         print(f"✓ Total features: {len(feature_names)}")
         
         return X_processed, y, feature_names, df_engineered
+    
+    def transform(self, df, target_column='high_risk'):
+        """
+        Apply the fitted pipeline to new data (e.g. for scoring)
+        
+        Statistical features reuse the training statistics, so a single
+        row is transformed exactly as it was during fit_transform.
+        """
+        df_engineered = self.create_clinical_features(df)
+        df_engineered = self.calculate_statistical_features(df_engineered, self.training_phq9_stats())
+        X = df_engineered.drop(columns=[target_column, 'time_to_event', 'event_occurred'], errors='ignore')
+        return self._as_output(self.preprocessor.transform(X))
+    
+    def training_phq9_stats(self):
+        """
+        PHQ-9 (mean, std) from fit_transform, or recovered from the fitted
+        preprocessor's scaler (e.g. a preprocessor loaded from a model package)
+        """
+        if self.phq9_stats is not None:
+            return self.phq9_stats
+        
+        numeric = self.preprocessor.named_transformers_['num']
+        index = list(numeric.feature_names_in_).index('phq9_score')
+        scaler = numeric.named_steps['scaler']
+        n = scaler.n_samples_seen_
+        # StandardScaler keeps the population std; pandas .std() is the sample std
+        self.phq9_stats = (float(scaler.mean_[index]), float(scaler.scale_[index] * np.sqrt(n / (n - 1))))
+        return self.phq9_stats
+    
+    def _as_output(self, X_processed):
+        if self.sparse and sp.issparse(X_processed):
+            return X_processed.tocsr()
+        return X_processed.toarray() if sp.issparse(X_processed) else X_processed
 
 def analyze_feature_importance(X, y, feature_names):
     """
     Statistical feature importance using ANOVA F-test
+    
+    Computed chunk-wise, so sparse X is never densified
     """
-    from sklearn.feature_selection import f_classif
+    from feature_importance import chunked_f_classif
     
-    f_scores, p_values = f_classif(X, y)
+    f_scores, p_values = chunked_f_classif(X, y)
     
     importance_df = pd.DataFrame({
         'feature': feature_names,
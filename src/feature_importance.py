@@ -0,0 +1,206 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy import sparse, stats
+from sklearn.metrics import get_scorer
+
+
+def _iter_chunks(X, y, chunk_size):
+    """
+    Yield (X_chunk, y_chunk) from an array/sparse matrix or an iterable of chunks
+    """
+    if y is None:
+        yield from X
+        return
+
+    y = np.asarray(y)
+    X = X.tocsr() if sparse.issparse(X) else X
+    for start in range(0, X.shape[0], chunk_size):
+        yield X[start:start + chunk_size], y[start:start + chunk_size]
+
+
+def chunked_f_classif(X, y=None, chunk_size=100_000):
+    """
+    ANOVA F-test computed from streamed per-class sums
+
+    X may be dense, sparse (CSR/CSC) or, with y=None, an iterable of
+    (X_chunk, y_chunk) pairs. Only per-class count/sum/sum-of-squares
+    vectors are kept, so no dense copy of X is ever made. Results match
+    sklearn.feature_selection.f_classif.
+    """
+    counts, sums, sumsq = {}, {}, {}
+
+    for X_chunk, y_chunk in _iter_chunks(X, y, chunk_size):
+        y_chunk = np.asarray(y_chunk)
+        for label in np.unique(y_chunk):
+            rows = X_chunk[y_chunk == label]
+            if sparse.issparse(rows):
+                chunk_sum = np.asarray(rows.sum(axis=0), dtype=np.float64).ravel()
+                chunk_sumsq = np.asarray(rows.multiply(rows).sum(axis=0), dtype=np.float64).ravel()
+            else:
+                rows = np.asarray(rows, dtype=np.float64)
+                chunk_sum = rows.sum(axis=0)
+                chunk_sumsq = np.einsum('ij,ij->j', rows, rows)
+
+            if label not in counts:
+                counts[label], sums[label], sumsq[label] = 0, 0.0, 0.0
+            counts[label] += rows.shape[0]
+            sums[label] = sums[label] + chunk_sum
+            sumsq[label] = sumsq[label] + chunk_sumsq
+
+    labels = sorted(counts)
+    n_classes = len(labels)
+    n_samples = sum(counts.values())
+    total_sum = sum(sums[label] for label in labels)
+    total_sumsq = sum(sumsq[label] for label in labels)
+
+    ss_total = total_sumsq - total_sum ** 2 / n_samples
+    ss_between = sum(sums[label] ** 2 / counts[label] for label in labels) - total_sum ** 2 / n_samples
+    ss_within = ss_total - ss_between
+
+    df_between = n_classes - 1
+    df_within = n_samples - n_classes
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f_scores = (ss_between / df_between) / (ss_within / df_within)
+    p_values = stats.f.sf(f_scores, df_between, df_within)
+
+    return np.asarray(f_scores).ravel(), np.asarray(p_values).ravel()
+
+
+def _permute_column(X, column, rng):
+    """
+    Copy of X with one column shuffled (sparse inputs stay sparse)
+    """
+    order = rng.permutation(X.shape[0])
+    if sparse.issparse(X):
+        X = X.tocsc(copy=True)
+        shuffled = X[:, column].toarray().ravel()[order]
+        return sparse.hstack([
+            X[:, :column], sparse.csc_matrix(shuffled[:, None]), X[:, column + 1:]
+        ], format='csr')
+
+    X_permuted = np.array(X, copy=True)
+    X_permuted[:, column] = X_permuted[order, column]
+    return X_permuted
+
+
+def _permutation_score(model, X, y, scorer, column, seed):
+    rng = np.random.RandomState(seed)
+    return column, scorer(model, _permute_column(X, column, rng), y)
+
+
+def parallel_permutation_importance(model, X, y, n_repeats=5, scoring='roc_auc',
+                                    n_jobs=-1, random_state=42, max_samples=None):
+    """
+    Model-based permutation importance, parallel over (feature, repeat) pairs
+
+    Returns (importances_mean, importances_std, importances) with
+    importances shaped (n_features, n_repeats), like
+    sklearn.inspection.permutation_importance.
+    """
+    y = np.asarray(y)
+    rng = np.random.RandomState(random_state)
+    if max_samples is not None and max_samples < X.shape[0]:
+        rows = rng.choice(X.shape[0], max_samples, replace=False)
+        X, y = X[rows], y[rows]
+
+    scorer = get_scorer(scoring)
+    baseline = scorer(model, X, y)
+    n_features = X.shape[1]
+    seeds = rng.randint(np.iinfo(np.int32).max, size=(n_features, n_repeats))
+
+    results = Parallel(n_jobs=n_jobs, prefer='processes')(
+        delayed(_permutation_score)(model, X, y, scorer, column, seeds[column, repeat])
+        for column in range(n_features)
+        for repeat in range(n_repeats)
+    )
+
+    importances = np.empty((n_features, n_repeats))
+    filled = np.zeros(n_features, dtype=int)
+    for column, score in results:
+        importances[column, filled[column]] = baseline - score
+        filled[column] += 1
+
+    return importances.mean(axis=1), importances.std(axis=1), importances
+
+
+class FeatureImportanceService:
+    """
+    F-test and permutation importance with on-disk caching
+
+    Results are cached as CSV under cache_dir, keyed by a fingerprint of
+    the model, the data and the parameters, so repeated notebook runs on
+    unchanged inputs return immediately.
+    """
+
+    def __init__(self, cache_dir='../data/processed/importance_cache', n_jobs=-1):
+        self.cache_dir = cache_dir
+        self.n_jobs = n_jobs
+
+    @staticmethod
+    def fingerprint(*parts):
+        """
+        Content hash of models, arrays (dense or sparse) and parameters
+        """
+        return joblib.hash(parts)
+
+    def _cached(self, kind, key, compute):
+        if self.cache_dir is None or key is None:
+            return compute()
+
+        path = os.path.join(self.cache_dir, f"{kind}_{key}.csv")
+        if os.path.exists(path):
+            print(f"✓ Loaded cached {kind} importance ({key[:8]})")
+            return pd.read_csv(path)
+
+        result = compute()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        result.to_csv(path, index=False)
+        return result
+
+    def f_test(self, X, y, feature_names, chunk_size=100_000, fingerprint=None):
+        """
+        ANOVA F-test importance (feature, f_score, p_value)
+
+        For streamed input (y=None, X an iterable of chunks) pass an explicit
+        fingerprint to enable caching.
+        """
+        if fingerprint is None and y is not None:
+            fingerprint = self.fingerprint(X, np.asarray(y), list(feature_names), chunk_size)
+
+        def compute():
+            f_scores, p_values = chunked_f_classif(X, y, chunk_size=chunk_size)
+            return pd.DataFrame({
+                'feature': feature_names,
+                'f_score': f_scores,
+                'p_value': p_values
+            }).sort_values('f_score', ascending=False)
+
+        return self._cached('f_test', fingerprint, compute)
+
+    def permutation(self, model, X, y, feature_names, n_repeats=5, scoring='roc_auc',
+                    random_state=42, max_samples=None):
+        """
+        Permutation importance (feature, importance_mean, importance_std)
+        """
+        fingerprint = self.fingerprint(
+            model, X, np.asarray(y), list(feature_names),
+            n_repeats, scoring, random_state, max_samples
+        )
+
+        def compute():
+            means, stds, _ = parallel_permutation_importance(
+                model, X, y,
+                n_repeats=n_repeats, scoring=scoring, n_jobs=self.n_jobs,
+                random_state=random_state, max_samples=max_samples
+            )
+            return pd.DataFrame({
+                'feature': feature_names,
+                'importance_mean': means,
+                'importance_std': stds
+            }).sort_values('importance_mean', ascending=False)
+
+        return self._cached('permutation', fingerprint, compute)
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+
+import joblib
+
+from config import MODEL_REGISTRY_PATH
+
+
+def _json_safe(value):
+    """
+    Keep only JSON-serialisable metadata (drops models, arrays, DataFrames)
+    """
+    try:
+        json.dumps(value)
+        return value
+    except TypeError:
+        if isinstance(value, dict):
+            return {k: _json_safe(v) for k, v in value.items() if _json_safe(v) is not None}
+        if hasattr(value, 'item'):
+            return value.item() if getattr(value, 'size', 1) == 1 else None
+        return None
+
+
+class ModelRegistry:
+    """
+    Local file-based registry of versioned model artifacts
+
+    Layout: <root>/<name>/<version>/{model.pkl, metadata.json} plus
+    <root>/<name>/aliases.json mapping aliases (e.g. 'production') to
+    versions. Versions are written to a temporary directory and renamed
+    into place, so readers never see a partially written artifact.
+    """
+
+    def __init__(self, root=MODEL_REGISTRY_PATH):
+        self.root = root
+
+    def _model_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def list_versions(self, name):
+        """
+        Metadata for every version of a model, oldest first
+        """
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+
+        versions = []
+        for version in sorted(os.listdir(model_dir)):
+            if version.startswith('.'):
+                continue
+            metadata_path = os.path.join(model_dir, version, 'metadata.json')
+            if os.path.exists(metadata_path):
+                with open(metadata_path) as f:
+                    versions.append(json.load(f))
+        return versions
+
+    def latest_version(self, name):
+        versions = self.list_versions(name)
+        return versions[-1]['version'] if versions else None
+
+    def _next_version(self, name):
+        existing = [v['version'] for v in self.list_versions(name)]
+        numbers = [int(v[1:]) for v in existing if v.startswith('v') and v[1:].isdigit()]
+        return f"v{max(numbers, default=0) + 1:04d}"
+
+    def register(self, name, artifact, metadata=None, version=None):
+        """
+        Store a new version of a model artifact and return its version id
+        """
+        version = version or self._next_version(name)
+        model_dir = self._model_dir(name)
+        final_dir = os.path.join(model_dir, version)
+        if os.path.exists(final_dir):
+            raise ValueError(f"Version {version} of {name} already exists")
+
+        os.makedirs(model_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix=f'.{version}-', dir=model_dir)
+        artifact_path = os.path.join(staging_dir, 'model.pkl')
+        joblib.dump(artifact, artifact_path)
+
+        with open(artifact_path, 'rb') as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+
+        package_info = {}
+        if isinstance(artifact, dict):
+            package_info = {
+                'model_name': artifact.get('model_name'),
+                'performance': _json_safe(artifact.get('performance')),
+                'feature_names': _json_safe(artifact.get('feature_names'))
+            }
+
+        record = {
+            'name': name,
+            'version': version,
+            'created_at': datetime.now().isoformat(),
+            'sha256': checksum,
+            **{k: v for k, v in package_info.items() if v is not None},
+            **(metadata or {})
+        }
+        with open(os.path.join(staging_dir, 'metadata.json'), 'w') as f:
+            json.dump(record, f, indent=2)
+
+        os.rename(staging_dir, final_dir)
+        print(f"✓ Registered {name} {version}")
+        return version
+
+    def register_file(self, name, path, metadata=None, version=None):
+        """
+        Import an existing pickled artifact (e.g. models/best_risk_model.pkl)
+        """
+        return self.register(
+            name, joblib.load(path),
+            metadata={'source_path': os.path.abspath(path), **(metadata or {})},
+            version=version
+        )
+
+    def resolve(self, name, version=None):
+        """
+        Resolve an alias or None (production alias, else latest) to a version id
+        """
+        aliases = self.aliases(name)
+        if version is None:
+            version = aliases.get('production') or self.latest_version(name)
+        return aliases.get(version, version)
+
+    def load(self, name, version=None):
+        """
+        Load (artifact, metadata) for a version, alias or the default version
+        """
+        version = self.resolve(name, version)
+        if version is None:
+            raise FileNotFoundError(f"No registered versions of {name}")
+
+        version_dir = os.path.join(self._model_dir(name), version)
+        with open(os.path.join(version_dir, 'metadata.json')) as f:
+            metadata = json.load(f)
+        return joblib.load(os.path.join(version_dir, 'model.pkl')), metadata
+
+    def aliases(self, name):
+        path = os.path.join(self._model_dir(name), 'aliases.json')
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def set_alias(self, name, alias, version):
+        """
+        Point an alias (e.g. 'production') at a version
+        """
+        if not os.path.isdir(os.path.join(self._model_dir(name), version)):
+            raise ValueError(f"Unknown version {version} of {name}")
+
+        aliases = {**self.aliases(name), alias: version}
+        path = os.path.join(self._model_dir(name), 'aliases.json')
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(aliases, f, indent=2)
+        os.replace(temporary, path)
+
+    def delete(self, name, version):
+        if version in self.aliases(name).values():
+            raise ValueError(f"{name} {version} is aliased; move the alias first")
+        shutil.rmtree(os.path.join(self._model_dir(name), version))
+
+
+if __name__ == '__main__':
+    # python model_registry.py ../models/best_risk_model.pkl risk_model [alias]
+    registry = ModelRegistry()
+    new_version = registry.register_file(sys.argv[2], sys.argv[1])
+    if len(sys.argv) > 3:
+        registry.set_alias(sys.argv[2], sys.argv[3], new_version)
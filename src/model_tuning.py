@@ -0,0 +1,277 @@
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.stats import loguniform, randint, uniform
+from sklearn.base import clone
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import HalvingRandomSearchCV, StratifiedKFold, train_test_split
+from sklearn.svm import SVC
+
+from config import BEST_MODEL_PATH
+from feature_engineer import MentalHealthFeatureEngineer
+
+# Per-family search spaces. 'resource' is what successive halving grows for
+# the surviving candidates: training rows, or trees for the ensembles.
+# Families with 'calibrate' are searched on decision_function and the winner
+# is wrapped in CalibratedClassifierCV for predict_proba: SVC's built-in
+# probability=True Platt scaling can come out inverted relative to the
+# decision function it was ranked on.
+SEARCH_SPACES = {
+    'Logistic Regression': {
+        'estimator': LogisticRegression(random_state=42, max_iter=1000, class_weight='balanced'),
+        'params': {
+            'C': loguniform(1e-3, 1e2),
+            'class_weight': ['balanced', None]
+        },
+        'resource': 'n_samples'
+    },
+    'Random Forest': {
+        'estimator': RandomForestClassifier(random_state=42, class_weight='balanced'),
+        'params': {
+            'max_depth': [None, 4, 8, 16],
+            'min_samples_leaf': randint(1, 20),
+            'max_features': ['sqrt', 'log2', 0.5]
+        },
+        'resource': 'n_estimators',
+        'max_resources': 400
+    },
+    'Gradient Boosting': {
+        'estimator': GradientBoostingClassifier(
+            random_state=42, n_iter_no_change=10, validation_fraction=0.1
+        ),
+        'params': {
+            'learning_rate': loguniform(0.01, 0.3),
+            'max_depth': randint(2, 6),
+            'subsample': uniform(0.6, 0.4),
+            'min_samples_leaf': randint(1, 30)
+        },
+        'resource': 'n_estimators',
+        'max_resources': 400
+    },
+    'SVM': {
+        'estimator': SVC(random_state=42, class_weight='balanced'),
+        'params': {
+            'C': loguniform(1e-2, 1e2),
+            'gamma': loguniform(1e-4, 1e0)
+        },
+        'resource': 'n_samples',
+        'calibrate': True
+    }
+}
+
+# Largest allowed gap between hold-out AUC (from predict_proba) and CV AUC
+AUC_TOLERANCE = 0.1
+
+
+def search_compute(search):
+    """
+    Compute spent by a halving search, in resource units (rows or trees)
+    summed over every candidate fit and CV split
+    """
+    return int(np.dot(search.n_candidates_, search.n_resources_) * search.n_splits_)
+
+
+def tune_model_family(spec, X_train, y_train, n_candidates=32, factor=3, cv=3,
+                      scoring='roc_auc', n_jobs=-1, random_state=42):
+    """
+    Successive-halving random search over one model family
+
+    All n_candidates start on the minimum resource (a slice of the
+    training rows, or a few trees); after each round only the top 1/factor
+    by CV score advance and their resource is multiplied by factor, so
+    most of the compute goes to promising configurations. The minimum is
+    chosen so the last round uses the full resource. Candidate fits run in
+    parallel across cores (n_jobs).
+    """
+    search = HalvingRandomSearchCV(
+        spec['estimator'],
+        spec['params'],
+        n_candidates=n_candidates,
+        factor=factor,
+        resource=spec['resource'],
+        min_resources='exhaust',
+        max_resources=spec.get('max_resources', 'auto'),
+        cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state),
+        scoring=scoring,
+        refit=False,
+        n_jobs=n_jobs,
+        random_state=random_state,
+        error_score=np.nan
+    )
+
+    start = time.time()
+    search.fit(X_train, y_train)
+    elapsed = time.time() - start
+
+    best_params = dict(search.best_params_)
+    if spec['resource'] != 'n_samples':
+        # The winner is refit with the largest resource it was scored on
+        best_params[spec['resource']] = int(search.n_resources_[-1])
+
+    # best_index_ is chosen among the candidates of the final round
+    return {
+        'search': search,
+        'best_params': best_params,
+        'cv_mean': float(search.cv_results_['mean_test_score'][search.best_index_]),
+        'cv_std': float(search.cv_results_['std_test_score'][search.best_index_]),
+        'n_candidates': int(search.n_candidates_[0]),
+        'n_iterations': int(search.n_iterations_),
+        'compute': search_compute(search),
+        'search_seconds': elapsed
+    }
+
+
+def evaluate_model(model, X_test, y_test):
+    """
+    Hold-out metrics in the notebook 03 results format
+    """
+    y_pred = model.predict(X_test)
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    return {
+        'accuracy': accuracy_score(y_test, y_pred),
+        'auc': roc_auc_score(y_test, y_pred_proba),
+        'precision': precision_score(y_test, y_pred, zero_division=0),
+        'recall': recall_score(y_test, y_pred, zero_division=0),
+        'f1': f1_score(y_test, y_pred, zero_division=0),
+        'y_pred_proba': y_pred_proba
+    }
+
+
+def tune_risk_models(X_processed, y, families=None, search_spaces=SEARCH_SPACES, n_candidates=32,
+                     factor=3, cv=3, time_budget=None, n_jobs=-1, random_state=42):
+    """
+    Tune each model family with successive halving and evaluate the winners
+
+    Compute is capped by n_candidates, factor and each family's
+    max_resources; time_budget (seconds) additionally skips any family
+    not yet started once the budget is spent. Returns (results,
+    results_df) where results mirrors notebook 03's per-model dict.
+    """
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_processed, y, test_size=0.2, random_state=random_state, stratify=y
+    )
+
+    results = {}
+    start = time.time()
+    for name in families or list(search_spaces):
+        if time_budget is not None and time.time() - start > time_budget:
+            print(f"⚠ Time budget spent, skipping {name}")
+            continue
+
+        spec = search_spaces[name]
+        print(f"Tuning {name}...")
+        tuned = tune_model_family(
+            spec, X_train, y_train, n_candidates=n_candidates, factor=factor, cv=cv,
+            n_jobs=n_jobs, random_state=random_state
+        )
+
+        model = clone(spec['estimator']).set_params(**tuned['best_params'])
+        if spec.get('calibrate'):
+            model = CalibratedClassifierCV(
+                model, method='sigmoid',
+                cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+            )
+        model.fit(X_train, y_train)
+
+        tuned.pop('search')
+        results[name] = {'model': model, **evaluate_model(model, X_test, y_test), **tuned}
+        # predict_proba must rank patients the way the search scored them
+        results[name]['auc_consistent'] = bool(abs(results[name]['auc'] - tuned['cv_mean']) <= AUC_TOLERANCE)
+        print(
+            f"{'✓' if results[name]['auc_consistent'] else '⚠'} {name}: CV AUC {tuned['cv_mean']:.3f}, "
+            f"test AUC {results[name]['auc']:.3f} ({tuned['n_candidates']} candidates, "
+            f"{tuned['n_iterations']} rounds, {tuned['search_seconds']:.1f}s)"
+        )
+
+    results_df = pd.DataFrame({
+        'Model': list(results.keys()),
+        'Accuracy': [results[name]['accuracy'] for name in results],
+        'AUC': [results[name]['auc'] for name in results],
+        'Precision': [results[name]['precision'] for name in results],
+        'Recall': [results[name]['recall'] for name in results],
+        'F1-Score': [results[name]['f1'] for name in results],
+        'CV AUC Mean': [results[name]['cv_mean'] for name in results],
+        'CV AUC Std': [results[name]['cv_std'] for name in results],
+        'Search Seconds': [results[name]['search_seconds'] for name in results],
+        'AUC Consistent': [results[name]['auc_consistent'] for name in results]
+    }).sort_values(['AUC Consistent', 'AUC'], ascending=False)
+
+    return results, results_df
+
+
+def save_best_model(results, results_df, engineer, feature_names, X_processed, y,
+                    output_path=BEST_MODEL_PATH, register=False):
+    """
+    Save the best tuned model as the notebook 03 package (optionally registering it)
+
+    Models whose hold-out predict_proba AUC disagrees with their CV AUC
+    are never saved.
+    """
+    if results_df.empty or not results_df.iloc[0]['AUC Consistent']:
+        raise ValueError('No tuned model passed the hold-out AUC consistency check')
+    best_model_name = results_df.iloc[0]['Model']
+    performance = {k: v for k, v in results[best_model_name].items() if k != 'model'}
+
+    model_package = {
+        'model': results[best_model_name]['model'],
+        'preprocessor': engineer.preprocessor,
+        'feature_names': feature_names,
+        'model_name': best_model_name,
+        'performance': performance,
+        'tuning': {
+            name: {'best_params': r['best_params'], 'cv_mean': r['cv_mean'], 'compute': r['compute']}
+            for name, r in results.items()
+        },
+        'training_data_info': {
+            'X_shape': X_processed.shape,
+            'y_distribution': pd.Series(y).value_counts().to_dict(),
+            'feature_columns': feature_names
+        }
+    }
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    joblib.dump(model_package, output_path)
+    print(f"✓ Best model ({best_model_name}, AUC {performance['auc']:.3f}) saved to {output_path}")
+
+    if register:
+        from model_registry import ModelRegistry
+        ModelRegistry().register('risk_model', model_package, metadata={'source_path': os.path.abspath(output_path)})
+
+    return model_package
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Successive-halving tuning for the risk classifiers')
+    parser.add_argument('--data', default='../data/processed/engineered_mh_data.csv')
+    parser.add_argument('--output', default=BEST_MODEL_PATH)
+    parser.add_argument('--families', nargs='+', choices=list(SEARCH_SPACES), default=None)
+    parser.add_argument('--n-candidates', type=int, default=32, help='Configurations sampled per family')
+    parser.add_argument('--factor', type=int, default=3, help='Halving factor')
+    parser.add_argument('--cv', type=int, default=3)
+    parser.add_argument('--time-budget', type=float, default=None, help='Seconds before remaining families are skipped')
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--register', action='store_true', help='Also add the package to the model registry')
+    args = parser.parse_args()
+
+    engineer = MentalHealthFeatureEngineer()
+    X_processed, y, feature_names, _ = engineer.fit_transform(pd.read_csv(args.data))
+
+    results, results_df = tune_risk_models(
+        X_processed, y, families=args.families, n_candidates=args.n_candidates, factor=args.factor,
+        cv=args.cv, time_budget=args.time_budget, n_jobs=args.n_jobs
+    )
+    print(results_df.round(3).to_string(index=False))
+    save_best_model(results, results_df, engineer, feature_names, X_processed, y,
+                    output_path=args.output, register=args.register)
+
+
+if __name__ == '__main__':
+    main()
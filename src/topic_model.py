@@ -0,0 +1,153 @@
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import LatentDirichletAllocation
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.utils import murmurhash3_32
+
+# Alphabetic tokens only: with no fitted vocabulary there is no min_df to drop
+# the per-note patient IDs the synthetic notes carry ("Patient ID: 1000")
+TOKEN_PATTERN = r"(?u)\b[a-zA-Z][a-zA-Z]+\b"
+
+
+class OnlineTopicModel:
+    """
+    Incremental topic model for the clinical note stream
+
+    Replaces notebook 05's TfidfVectorizer + batch topic model with a
+    stateless HashingVectorizer and online (minibatch) LDA. Each chunk of
+    notes is hashed into a fixed number of columns and folded into the
+    topic-word matrix with partial_fit, so memory is bounded by
+    n_topics x n_features regardless of corpus size and old notes are never
+    revisited. The notebook's max_df is kept as a running document
+    frequency per hash bucket: buckets that appear in more than max_df of
+    the notes seen so far (template text such as "Assessment date") are
+    masked out. A term name is remembered per bucket (at most n_features
+    entries) so topics can still be displayed.
+    """
+
+    def __init__(self, n_topics=5, n_features=2 ** 16, ngram_range=(1, 2), max_df=0.8,
+                 batch_size=512, total_samples=1_000_000, random_state=42):
+        self.n_topics = n_topics
+        self.n_features = n_features
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            stop_words='english',
+            ngram_range=ngram_range,
+            token_pattern=TOKEN_PATTERN,
+            alternate_sign=False,
+            norm=None
+        )
+        self.lda = LatentDirichletAllocation(
+            n_components=n_topics,
+            learning_method='online',
+            learning_offset=10.0,
+            batch_size=batch_size,
+            total_samples=total_samples,
+            random_state=random_state
+        )
+        self.max_df = max_df
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.terms = {}
+        self.n_notes_seen = 0
+
+    def _hash(self, notes):
+        notes = pd.Series(notes, dtype=object).fillna('').astype(str).tolist()
+        return self.vectorizer.transform(notes), notes
+
+    def _mask_frequent(self, X):
+        """
+        Drop buckets above max_df of the notes seen so far
+        """
+        if self.n_notes_seen == 0:
+            return X
+        keep = self.doc_freq <= self.max_df * self.n_notes_seen
+        X = X.copy()
+        X.data *= keep[X.indices]
+        X.eliminate_zeros()
+        return X
+
+    def _remember_terms(self, notes):
+        analyzer = self.vectorizer.build_analyzer()
+        for note in notes:
+            for term in analyzer(note):
+                # Same bucket HashingVectorizer uses (signed murmurhash, seed 0)
+                index = abs(murmurhash3_32(term, seed=0)) % self.n_features
+                self.terms.setdefault(index, term)
+
+    def partial_fit(self, notes):
+        """
+        Update the topic model with one chunk of notes
+        """
+        X, notes = self._hash(notes)
+        if X.shape[0] == 0:
+            return self
+        self.doc_freq += np.bincount(X.indices, minlength=self.n_features)
+        self.n_notes_seen += X.shape[0]
+        self.lda.partial_fit(self._mask_frequent(X))
+        self._remember_terms(notes)
+        return self
+
+    def transform(self, notes):
+        """
+        Document-topic distributions for notes (rows sum to 1)
+        """
+        X, _ = self._hash(notes)
+        return self.lda.transform(self._mask_frequent(X))
+
+    def dominant_topic(self, notes):
+        return self.transform(notes).argmax(axis=1)
+
+    def update_and_assign(self, notes):
+        """
+        Fold a chunk of new notes into the model and return their dominant topics
+        """
+        self.partial_fit(notes)
+        return self.dominant_topic(notes)
+
+    def topic_terms(self, n_top_words=10):
+        """
+        Top terms per topic, in the notebook's {'Topic_i': [...]} format
+        """
+        keep = self.doc_freq <= self.max_df * self.n_notes_seen
+        topics = {}
+        for topic_idx, topic in enumerate(self.lda.components_):
+            top = [i for i in topic.argsort()[::-1] if keep[i] and i in self.terms][:n_top_words]
+            topics[f"Topic_{topic_idx}"] = [self.terms[i] for i in top]
+        return topics
+
+    def display_topics(self, n_top_words=10):
+        topics = self.topic_terms(n_top_words)
+        for name, words in topics.items():
+            print(f"{name.replace('_', ' ')}: {', '.join(words)}")
+        return topics
+
+    def process_csv(self, input_path, output_path=None, text_column='clinical_note', chunksize=10_000):
+        """
+        Stream a note CSV in chunks, updating the model and adding dominant_topic
+
+        Each chunk is assigned topics by the model as it stands after that
+        chunk's update; earlier chunks are not reassigned. With an
+        output_path the annotated chunks are appended to a CSV, otherwise
+        the topic assignments are returned as a Series.
+        """
+        assignments = []
+        for i, chunk in enumerate(pd.read_csv(input_path, chunksize=chunksize)):
+            chunk['dominant_topic'] = self.update_and_assign(chunk[text_column])
+            if output_path:
+                chunk.to_csv(output_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            else:
+                assignments.append(chunk['dominant_topic'])
+
+        print(f"✓ Topic model updated: {self.n_notes_seen:,} notes seen")
+        if output_path:
+            return output_path
+        return pd.concat(assignments) if assignments else pd.Series(dtype=np.int64)
+
+    def save(self, path):
+        joblib.dump(self, path)
+        print(f"✓ Topic model saved to {path}")
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
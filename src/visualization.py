@@ -0,0 +1,306 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+class PlotDataCache:
+    """
+    Small LRU cache of plot-ready aggregates keyed by input fingerprint
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached aggregate for key, computing it on first use
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        value = compute()
+        self._entries[key] = value
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+plot_cache = PlotDataCache()
+
+
+def data_fingerprint(data, *params):
+    """
+    Stable hash of the input data and aggregation parameters
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    if isinstance(data, pd.DataFrame):
+        digest.update(repr(list(data.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    elif isinstance(data, pd.Series):
+        digest.update(str(data.name).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    else:
+        for array in data if isinstance(data, (tuple, list)) else [data]:
+            array = np.ascontiguousarray(array)
+            digest.update(f"{array.dtype.str}{array.shape}".encode())
+            digest.update(array.tobytes())
+
+    digest.update(repr(params).encode())
+    return digest.hexdigest()
+
+
+def _cached(name, data, params, compute, cache_key=None):
+    key = (name, cache_key if cache_key is not None else data_fingerprint(data, *params))
+    return plot_cache.get_or_compute(key, compute)
+
+
+def _quantiles_from_histogram(counts, edges, probs):
+    """
+    Interpolate quantiles from binned counts (error bounded by one bin width)
+    """
+    total = counts.sum()
+    if total == 0:
+        return np.full(len(probs), np.nan)
+
+    cumulative = np.concatenate([[0], np.cumsum(counts)]) / total
+    return np.interp(probs, cumulative, edges)
+
+
+def distribution_summary(df, column, by=None, bins=64, value_range=None, cache_key=None):
+    """
+    Fixed-bin histograms and box statistics for a column, optionally per group
+
+    Everything is derived from one binning pass over the data, so the result
+    size depends only on the number of bins and groups, not on the number of
+    rows. Quartiles and whiskers are interpolated from the bins.
+    """
+    params = (column, by, bins, value_range)
+    subset = df[[column] + ([by] if by else [])]
+
+    def compute():
+        values = subset[column].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+
+        if by:
+            codes, groups = pd.factorize(subset[by], sort=True)
+            valid &= codes >= 0
+            codes = codes[valid]
+        else:
+            groups = pd.Index(['all'])
+            codes = np.zeros(int(valid.sum()), dtype=np.int64)
+        values = values[valid]
+
+        if value_range is None:
+            low, high = (values.min(), values.max()) if len(values) else (0.0, 1.0)
+        else:
+            low, high = value_range
+        if high <= low:
+            high = low + 1.0
+
+        edges = np.linspace(low, high, bins + 1)
+        bin_index = np.clip(((values - low) / (high - low) * bins).astype(np.int64), 0, bins - 1)
+
+        # One pass: joint (group, bin) counts plus per-group moments and extremes
+        flat = codes * bins + bin_index
+        counts = np.bincount(flat, minlength=len(groups) * bins).reshape(len(groups), bins)
+        sums = np.bincount(codes, weights=values, minlength=len(groups))
+        group_min = np.full(len(groups), np.inf)
+        group_max = np.full(len(groups), -np.inf)
+        np.minimum.at(group_min, codes, values)
+        np.maximum.at(group_max, codes, values)
+
+        summaries = {}
+        for i, group in enumerate(groups):
+            n = int(counts[i].sum())
+            q1, median, q3 = _quantiles_from_histogram(counts[i], edges, [0.25, 0.5, 0.75])
+            iqr = q3 - q1
+            summaries[group] = {
+                'count': n,
+                'mean': sums[i] / n if n else np.nan,
+                'min': group_min[i] if n else np.nan,
+                'q1': q1,
+                'median': median,
+                'q3': q3,
+                'max': group_max[i] if n else np.nan,
+                'whisker_low': max(group_min[i], q1 - 1.5 * iqr) if n else np.nan,
+                'whisker_high': min(group_max[i], q3 + 1.5 * iqr) if n else np.nan,
+                'counts': counts[i],
+                'density': counts[i] / (n * (edges[1] - edges[0])) if n else counts[i].astype(float),
+            }
+
+        return {'column': column, 'by': by, 'edges': edges, 'groups': summaries}
+
+    return _cached('distribution', subset, params, compute, cache_key)
+
+
+def kaplan_meier_curve(durations, events, n_points=500, cache_key=None):
+    """
+    Kaplan-Meier survival curve thinned to a fixed time grid
+
+    The full estimator is computed on all event times, then sampled as a
+    step function on n_points evenly spaced times (roughly one per pixel),
+    so the plotted curve is the same regardless of cohort size.
+    """
+    durations = np.asarray(durations, dtype=np.float64)
+    events = np.asarray(events).astype(bool)
+
+    def compute():
+        order = np.argsort(durations, kind='mergesort')
+        times = durations[order]
+        observed = events[order]
+
+        grid = np.linspace(0.0, times[-1] if len(times) else 0.0, n_points)
+        # At risk at t: subjects whose duration is >= t
+        grid_at_risk = len(times) - np.searchsorted(times, grid, side='left')
+        if not len(times):
+            grid_survival = np.ones(n_points)
+        else:
+            unique_times, first_index = np.unique(times, return_index=True)
+            deaths = np.add.reduceat(observed.astype(np.int64), first_index)
+            survival = np.cumprod(1.0 - deaths / (len(times) - first_index))
+            position = np.searchsorted(unique_times, grid, side='right') - 1
+            grid_survival = np.where(position >= 0, survival[np.maximum(position, 0)], 1.0)
+
+        return pd.DataFrame({
+            'timeline': grid,
+            'survival': grid_survival,
+            'at_risk': grid_at_risk
+        })
+
+    return _cached('kaplan_meier', (durations, events), (n_points,), compute, cache_key)
+
+
+def kaplan_meier_by_group(df, duration_col, event_col, group_col, n_points=500):
+    """
+    Thinned Kaplan-Meier curves for each level of group_col
+    """
+    curves = {}
+    for group, group_df in df.groupby(group_col, observed=True):
+        curves[group] = kaplan_meier_curve(
+            group_df[duration_col].to_numpy(),
+            group_df[event_col].to_numpy(),
+            n_points=n_points
+        )
+    return curves
+
+
+def correlation_matrix(df, columns=None, chunk_size=100_000, cache_key=None):
+    """
+    Pearson correlation computed in float32 chunks
+
+    Two streaming passes (means, then centred cross-products) keep peak
+    memory at one float32 chunk. Missing values are mean-filled, so they
+    contribute nothing to the covariance.
+    """
+    if columns is None:
+        columns = df.select_dtypes(include='number').columns.tolist()
+    subset = df[columns]
+
+    def compute():
+        n_cols = len(columns)
+        totals = np.zeros(n_cols)
+        observed = np.zeros(n_cols)
+        for start in range(0, len(subset), chunk_size):
+            chunk = subset.iloc[start:start + chunk_size].to_numpy(dtype=np.float32)
+            totals += np.nansum(chunk, axis=0, dtype=np.float64)
+            observed += (~np.isnan(chunk)).sum(axis=0)
+        means = (totals / np.maximum(observed, 1)).astype(np.float32)
+
+        cross = np.zeros((n_cols, n_cols))
+        for start in range(0, len(subset), chunk_size):
+            chunk = subset.iloc[start:start + chunk_size].to_numpy(dtype=np.float32)
+            chunk -= means
+            np.nan_to_num(chunk, copy=False)
+            cross += chunk.T @ chunk
+
+        std = np.sqrt(np.diag(cross))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cross / np.outer(std, std)
+        return pd.DataFrame(corr, index=columns, columns=columns)
+
+    return _cached('correlation', subset, (chunk_size,), compute, cache_key)
+
+
+def plot_distribution(summary, ax=None, kind='hist'):
+    """
+    Render a distribution summary as overlaid histograms or box plots
+    """
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        _, ax = plt.subplots(figsize=(10, 6))
+
+    edges = summary['edges']
+    groups = summary['groups']
+
+    if kind == 'box':
+        stats = [{
+            'label': str(group),
+            'med': s['median'], 'q1': s['q1'], 'q3': s['q3'],
+            'whislo': s['whisker_low'], 'whishi': s['whisker_high'],
+            'fliers': []
+        } for group, s in groups.items()]
+        ax.bxp(stats, showfliers=False)
+        ax.set_ylabel(summary['column'])
+    else:
+        for group, s in groups.items():
+            ax.stairs(s['density'], edges, label=str(group), fill=len(groups) == 1, alpha=0.6)
+        ax.set_xlabel(summary['column'])
+        ax.set_ylabel('Density')
+        if summary['by']:
+            ax.legend(title=summary['by'])
+
+    return ax
+
+
+def plot_survival_curves(curves, ax=None):
+    """
+    Plot pre-thinned Kaplan-Meier curves ({label: curve_df} or a single curve)
+    """
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        _, ax = plt.subplots(figsize=(10, 6))
+    if isinstance(curves, pd.DataFrame):
+        curves = {'All patients': curves}
+
+    for label, curve in curves.items():
+        ax.step(curve['timeline'], curve['survival'], where='post', label=str(label))
+
+    ax.set_xlabel('Time (days)')
+    ax.set_ylabel('Survival probability')
+    ax.set_ylim(0, 1.05)
+    ax.legend()
+    return ax
+
+
+def plot_correlation_heatmap(corr, ax=None, cmap='coolwarm'):
+    """
+    Heatmap of a (pre-computed) correlation matrix
+    """
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        _, ax = plt.subplots(figsize=(12, 10))
+
+    image = ax.imshow(corr.to_numpy(), cmap=cmap, vmin=-1, vmax=1)
+    ax.set_xticks(range(len(corr.columns)))
+    ax.set_xticklabels(corr.columns, rotation=90)
+    ax.set_yticks(range(len(corr.index)))
+    ax.set_yticklabels(corr.index)
+    ax.figure.colorbar(image, ax=ax)
+    return ax
@@ -0,0 +1,87 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from assessment_store import AssessmentStore
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def store():
+    store = AssessmentStore()
+    yield store
+    store.close()
+
+
+def test_slope_matches_least_squares(store):
+    days = np.array([0, 7, 14, 28])
+    phq9 = np.array([20, 17, 15, 9])
+    for day, score in zip(days, phq9):
+        store.add_assessment('p1', score, 10, START + timedelta(days=int(day)))
+
+    trajectory = store.get_trajectory('p1')
+    expected = np.polyfit(days, phq9, 1)[0] * 7
+    assert trajectory['n_assessments'] == 4
+    assert trajectory['latest_phq9'] == 9
+    assert trajectory['phq9_delta'] == -6
+    assert trajectory['phq9_slope_per_week'] == pytest.approx(expected)
+    assert trajectory['gad7_slope_per_week'] == pytest.approx(0)
+
+
+def test_backfilled_assessment_rebuilds_trajectory(store):
+    store.add_assessment('p1', 10, 8, START)
+    store.add_assessment('p1', 14, 12, START + timedelta(days=14))
+    store.add_assessment('p1', 12, 9, START + timedelta(days=7))
+
+    trajectory = store.get_trajectory('p1')
+    assert trajectory['n_assessments'] == 3
+    assert trajectory['latest_phq9'] == 14
+    assert trajectory['phq9_delta'] == 2
+    assert trajectory['phq9_slope_per_week'] == pytest.approx(2.0)
+    assert trajectory['last_assessed_at'] == (START + timedelta(days=14)).isoformat()
+
+
+def test_duplicate_assessment_is_ignored(store):
+    first = store.add_assessment('p1', 10, 8, START)
+    store.add_assessment('p1', 12, 9, START + timedelta(days=7))
+    duplicate = store.add_assessment('p1', 10, 8, START)
+
+    assert first['duplicate'] is False
+    assert duplicate['duplicate'] is True
+    assert duplicate['n_assessments'] == 2
+    assert len(store.history('p1')) == 2
+    assert store.get_trajectory('p1')['latest_phq9'] == 12
+
+
+def test_failed_batch_is_rolled_back_and_retryable(store):
+    records = [
+        {'patient_id': 'p1', 'phq9_score': 10, 'gad7_score': 8, 'assessed_at': START.isoformat()},
+        {'patient_id': 'p1', 'phq9_score': 'not a score', 'gad7_score': 9}
+    ]
+    with pytest.raises(ValueError):
+        store.add_assessment_records(records)
+    assert store.get_trajectory('p1') is None
+
+    records[1]['phq9_score'] = 12
+    records[1]['assessed_at'] = (START + timedelta(days=7)).isoformat()
+    results = store.add_assessment_records(records)
+    assert [r['duplicate'] for r in results] == [False, False]
+    assert store.add_assessment_records(records)[1]['n_assessments'] == 2
+
+
+def test_trajectory_frame(store):
+    store.add_assessments(pd.DataFrame({
+        'patient_id': ['p1', 'p1', 'p2'],
+        'phq9_score': [10, 12, 5],
+        'gad7_score': [8, 9, 4],
+        'assessed_at': [START, START + timedelta(days=7), START]
+    }))
+    frame = store.trajectory_frame(['p1', 'p2', 'missing']).set_index('patient_id')
+    assert sorted(frame.index) == ['p1', 'p2']
+    assert frame.loc['p1', 'n_assessments'] == 2
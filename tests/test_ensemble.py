@@ -0,0 +1,74 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+from ensemble import EnsembleComponent, EnsemblePipeline, predict_structured, predict_survival
+
+PATIENT = {'phq9_score': 12, 'gad7_score': 9, 'age': 40}
+SLOW_SECONDS = 5
+SLOW_BUDGET_MS = 200
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def sleeping(event):
+    def predict(patient_data):
+        event.wait(SLOW_SECONDS)
+        return 0.9
+    return predict
+
+
+def test_slow_component_times_out_within_budget(release):
+    pipeline = EnsemblePipeline([
+        EnsembleComponent('structured_model', predict_structured, weight=0.5, budget_ms=50),
+        EnsembleComponent('slow', sleeping(release), weight=0.5, budget_ms=30, max_concurrency=2)
+    ])
+    result = pipeline.predict(PATIENT)
+
+    assert result['skipped_components'] == {'slow': 'timeout'}
+    assert result['final_risk_score'] == pytest.approx(predict_structured(PATIENT))
+    # Returned at the budget, not when the component finished
+    assert result['total_latency_ms'] < SLOW_SECONDS * 1000
+
+
+def test_saturated_component_is_shed_without_starving_others(release):
+    pipeline = EnsemblePipeline([
+        EnsembleComponent('structured_model', predict_structured, weight=0.5, budget_ms=50),
+        EnsembleComponent('survival_risk', predict_survival, weight=0.2, budget_ms=50),
+        EnsembleComponent('slow', sleeping(release), weight=0.3, budget_ms=SLOW_BUDGET_MS, max_concurrency=2)
+    ])
+    for _ in range(2):
+        assert pipeline.predict(PATIENT)['skipped_components'] == {'slow': 'timeout'}
+
+    # Both slow slots are still held by the timed-out calls: shed, don't queue
+    result = pipeline.predict(PATIENT)
+    assert result['skipped_components'] == {'slow': 'overloaded'}
+    assert set(result['model_breakdown']) == {'structured_model', 'survival_risk'}
+    # Shed immediately instead of waiting out the slow component's budget
+    assert result['total_latency_ms'] < SLOW_BUDGET_MS
+
+    release.set()
+    pipeline.executors['slow'].shutdown(wait=True)
+    assert pipeline.slots['slow'].acquire(blocking=False)
+
+
+def test_all_components_late_falls_back_to_clinical_score(release):
+    pipeline = EnsemblePipeline([
+        EnsembleComponent('slow', sleeping(release), weight=1.0, budget_ms=SLOW_BUDGET_MS, max_concurrency=1)
+    ])
+    first = pipeline.predict(PATIENT)
+    second = pipeline.predict(PATIENT)
+
+    expected = predict_structured(PATIENT)
+    assert first['model_breakdown'] == {'fallback': expected}
+    assert second['skipped_components'] == {'slow': 'overloaded'}
+    assert second['final_risk_score'] == pytest.approx(expected)
+    assert second['total_latency_ms'] < SLOW_BUDGET_MS
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from feature_engineer import MentalHealthFeatureEngineer
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'processed', 'engineered_mh_data.csv')
+
+
+@pytest.fixture(scope='module')
+def cohort():
+    return pd.read_csv(DATA_PATH).head(300)
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_single_row_transform_matches_fit(cohort, sparse):
+    engineer = MentalHealthFeatureEngineer(sparse=sparse)
+    X_processed, _, _, _ = engineer.fit_transform(cohort)
+
+    row = engineer.transform(cohort.iloc[[0]])
+    if sparse:
+        row, X_processed = row.toarray(), X_processed.toarray()
+    np.testing.assert_allclose(row[0], X_processed[0])
+
+
+def test_training_stats_recovered_from_preprocessor(cohort):
+    engineer = MentalHealthFeatureEngineer()
+    engineer.fit_transform(cohort)
+
+    loaded = MentalHealthFeatureEngineer()
+    loaded.preprocessor = engineer.preprocessor
+    np.testing.assert_allclose(loaded.training_phq9_stats(), engineer.phq9_stats)
+
+
+def test_sparse_output_matches_dense(cohort):
+    dense_engineer = MentalHealthFeatureEngineer()
+    dense, _, dense_names, _ = dense_engineer.fit_transform(cohort)
+    engineer = MentalHealthFeatureEngineer(sparse=True)
+    X_sparse, _, sparse_names, _ = engineer.fit_transform(cohort)
+
+    assert sparse.isspmatrix_csr(X_sparse)
+    assert sparse_names == dense_names
+    np.testing.assert_allclose(X_sparse.toarray(), dense)
+
+    # Unknown categories leave ragged one-hot rows (generic stacking path)
+    unseen = cohort.head(4).assign(employment=['Retired', 'Employed', 'Student', 'Employed'])
+    np.testing.assert_allclose(engineer.transform(unseen).toarray(), dense_engineer.transform(unseen))
+
+
+def test_sparse_mode_stays_dense_when_csr_is_larger():
+    X = pd.DataFrame({'a': [1.0, 2.0, 3.0, 4.0], 'b': [0.5, 0.1, 0.2, 0.3], 'flag': ['x', 'y', 'x', 'y']})
+    engineer = MentalHealthFeatureEngineer(sparse=True)
+    X_processed = engineer._as_output(engineer.create_preprocessor(X).fit_transform(X))
+    assert isinstance(X_processed, np.ndarray)
@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+from schema import ASSESSMENT_SCHEMA, PATIENT_SCHEMA
+
+
+def test_null_enums_score_like_defaults_in_both_paths():
+    record = {'phq9_score': 5, 'gad7_score': 4, 'age': 30, 'employment': None, 'education': None}
+    defaults = {**record, 'employment': 'Employed', 'education': 'College'}
+
+    assert PATIENT_SCHEMA.validate(record) is None
+    assert record == defaults
+
+    batch = PATIENT_SCHEMA.to_batch([
+        {**record, 'employment': None, 'education': None}, defaults
+    ]).score()
+    assert batch.records['valid'].all()
+    assert batch.records['risk_score'][0] == batch.records['risk_score'][1]
+
+
+def test_unknown_enum_rejected():
+    record = {'phq9_score': 5, 'gad7_score': 4, 'employment': 'Astronaut'}
+    assert PATIENT_SCHEMA.validate(record) == PATIENT_SCHEMA._messages['employment']
+    assert not PATIENT_SCHEMA.to_batch([record]).records['valid'][0]
+
+
+def test_non_string_enum_rejected():
+    for record in (
+        {'phq9_score': 5, 'gad7_score': 4, 'employment': ['x']},
+        {'phq9_score': 5, 'gad7_score': 4, 'education': {}}
+    ):
+        name = 'employment' if 'employment' in record else 'education'
+        assert PATIENT_SCHEMA.validate(record) == PATIENT_SCHEMA._messages[name]
+        assert not PATIENT_SCHEMA.to_batch([record]).records['valid'][0]
+
+
+def test_assessment_scores_range_checked():
+    assert ASSESSMENT_SCHEMA.validate({'patient_id': 'P1', 'phq9_score': 12, 'gad7_score': 8}) is None
+    assert ASSESSMENT_SCHEMA.validate({'patient_id': 'P1', 'phq9_score': 999, 'gad7_score': 8}) == \
+        PATIENT_SCHEMA._messages['phq9_score']
+    assert ASSESSMENT_SCHEMA.validate({'patient_id': 'P1', 'phq9_score': 12, 'gad7_score': -1}) == \
+        PATIENT_SCHEMA._messages['gad7_score']
+    assert ASSESSMENT_SCHEMA.validate({'phq9_score': 12, 'gad7_score': 8}) == 'Missing required field: patient_id'
+    assert ASSESSMENT_SCHEMA.validate(['P1', 12, 8]) == 'Patient record must be a JSON object'
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from visualization import kaplan_meier_curve
+
+
+def test_kaplan_meier_at_risk_includes_ties_at_grid_time():
+    curve = kaplan_meier_curve([1, 2, 2, 3, 5], [1, 1, 0, 1, 1], n_points=6).set_index('timeline')
+    assert curve.loc[[1.0, 2.0, 3.0, 5.0], 'at_risk'].tolist() == [5, 4, 2, 1]
+    np.testing.assert_allclose(curve.loc[[1.0, 2.0, 3.0, 5.0], 'survival'], [0.8, 0.6, 0.3, 0.0])
+
+
+def test_kaplan_meier_empty_cohort():
+    curve = kaplan_meier_curve([], [], n_points=3)
+    assert curve['survival'].tolist() == [1.0, 1.0, 1.0]
+    assert curve['at_risk'].tolist() == [0, 0, 0]